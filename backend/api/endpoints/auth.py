@@ -1,48 +1,41 @@
 """
 Authentication API endpoints (register, login, logout)
 """
-from fastapi import APIRouter, HTTPException, Depends, status, Request
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, EmailStr, Field, validator
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, status, Request
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from typing import Optional
-from datetime import datetime, timedelta
-from database.connection import get_db
+from uuid import UUID
+from datetime import datetime, timedelta, timezone
+from database.connection import get_db, get_db_context
 from database.models import User, UserSession, PasswordResetToken
-from services.user_service import UserService
 from services.tenant_service import TenantService
-from utils.jwt import create_access_token
-from utils.dependencies import get_current_tenant_id, get_current_user
-from passlib.context import CryptContext
-import hashlib
+from services.user_service import UserService
+from utils.jwt import create_access_token, decode_access_token, hash_token, hash_token_digest
+from utils.dependencies import get_current_tenant, get_current_tenant_id, get_current_user, get_bearer_token
+from utils.validators import EmailAddress
+from utils.token_cache import user_token_cache
 import secrets
 import logging
 
 router = APIRouter()
-security = HTTPBearer()
 logger = logging.getLogger(__name__)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 # Request/Response Models
 class RegisterRequest(BaseModel):
     """User registration request"""
-    email: EmailStr
+    email: EmailAddress
     password: str = Field(..., min_length=8, description="Password must be at least 8 characters")
     first_name: Optional[str] = None
     last_name: Optional[str] = None
-    
-    @validator('password')
-    def validate_password(cls, v):
-        if len(v) < 8:
-            raise ValueError("Password must be at least 8 characters long")
-        return v
 
 
 class LoginRequest(BaseModel):
     """User login request"""
-    email: EmailStr
+    email: EmailAddress
     password: str
 
 
@@ -56,7 +49,7 @@ class LoginResponse(BaseModel):
 
 class UserResponse(BaseModel):
     """User information response"""
-    id: str
+    id: UUID
     email: str
     first_name: Optional[str]
     last_name: Optional[str]
@@ -70,7 +63,7 @@ class UserResponse(BaseModel):
 
 class ForgotPasswordRequest(BaseModel):
     """Forgot password request"""
-    email: EmailStr
+    email: EmailAddress
 
 
 class ResetPasswordRequest(BaseModel):
@@ -88,16 +81,9 @@ async def register(
     """
     Register a new user for the current tenant
     """
-    # Get tenant_id from request state
-    tenant_id = get_current_tenant_id(request)
-    
-    # Verify tenant exists and is active
-    tenant = TenantService.get_tenant_by_id(tenant_id, db)
-    if not tenant:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Tenant not found"
-        )
+    # Tenant resolved from the host by TenantMiddleware (already in memory)
+    tenant = get_current_tenant(request)
+    tenant_id = str(tenant.id)
     
     if not tenant.is_active:
         raise HTTPException(
@@ -105,8 +91,18 @@ async def register(
             detail="Tenant account is inactive"
         )
     
+    # Check licenses before paying for the hash; create_user is told not to repeat the query
+    if not TenantService.check_license_availability(tenant_id, db):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No available licenses. Please purchase more licenses."
+        )
+    
+    # Hash in the threadpool so the slow KDF doesn't block the event loop
+    password_hash = await run_in_threadpool(UserService.hash_password, register_data.password)
+
     try:
-        # Create user (service checks license availability)
+        # Create user (licenses already checked above)
         user = UserService.create_user(
             tenant_id=tenant_id,
             email=register_data.email,
@@ -114,13 +110,15 @@ async def register(
             first_name=register_data.first_name,
             last_name=register_data.last_name,
             is_admin=False,
-            db=db
+            db=db,
+            password_hash=password_hash,
+            check_license=False
         )
         
-        logger.info(f"User registered: {user.email} for tenant {tenant_id}")
+        logger.info("User registered: %s for tenant %s", user.email, tenant_id)
         
         return UserResponse(
-            id=str(user.id),
+            id=user.id,
             email=user.email,
             first_name=user.first_name,
             last_name=user.last_name,
@@ -147,29 +145,34 @@ async def login(
     # Get tenant_id from request state
     tenant_id = get_current_tenant_id(request)
     
-    # Authenticate user
-    user = UserService.authenticate_user(
-        email=login_data.email,
-        password=login_data.password,
-        tenant_id=tenant_id,
-        db=db
+    # Authenticate user: DB lookup stays on the loop (the session is not thread-safe),
+    # the password hash check runs in the threadpool so it doesn't block other requests
+    user = UserService.get_login_candidate(login_data.email, tenant_id, db)
+    password_ok = user is not None and await run_in_threadpool(
+        UserService.verify_password, login_data.password, user.password_hash
     )
     
-    if not user:
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
     
+    # Upgrade legacy password hashes (bcrypt -> argon2id) while we have the plaintext
+    if UserService.password_needs_rehash(user.password_hash):
+        user.password_hash = await run_in_threadpool(UserService.hash_password, login_data.password)
+
+    # Timestamp columns are naive UTC
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    
     # Update last login
-    user.last_login = datetime.utcnow()
+    user.last_login = now
     
-    # SINGLE SESSION ENFORCEMENT: Invalidate all previous sessions for this user
+    # SINGLE SESSION ENFORCEMENT: Remove all previous sessions for this user, expired
+    # ones included (committed together with the new session and last_login below)
     db.query(UserSession).filter(
-        UserSession.user_id == user.id,
-        UserSession.expires_at > datetime.utcnow()
-    ).delete()
-    db.commit()
+        UserSession.user_id == user.id
+    ).delete(synchronize_session=False)
     
     # Create JWT token
     token_data = {
@@ -181,28 +184,18 @@ async def login(
     access_token = create_access_token(token_data)
     
     # Create session record
-    token_hash = hashlib.sha256(access_token.encode()).hexdigest()
-    expires_at = datetime.utcnow() + timedelta(days=7)
-    
-    session = UserSession(
-        user_id=user.id,
-        tenant_id=user.tenant_id,
-        token_hash=token_hash,
-        expires_at=expires_at
-    )
-    db.add(session)
-    db.commit()
-    
-    # Get tenant info
-    tenant = TenantService.get_tenant_by_id(tenant_id, db)
+    token_hash = hash_token(access_token)
+    expires_at = now + timedelta(days=7)
     
-    logger.info(f"User logged in: {user.email} for tenant {tenant_id}")
-    
-    return LoginResponse(
+    # Build the response before committing: commit expires the loaded user, and
+    # reading it afterwards would reload the row. The tenant is the snapshot
+    # TenantMiddleware resolved from the host, so it needs no query at all
+    tenant = get_current_tenant(request)
+    response = LoginResponse(
         access_token=access_token,
         token_type="bearer",
         user={
-            "id": str(user.id),
+            "id": user.id,
             "email": user.email,
             "first_name": user.first_name,
             "last_name": user.last_name,
@@ -210,7 +203,7 @@ async def login(
             "is_active": user.is_active
         },
         tenant={
-            "id": str(tenant.id),
+            "id": tenant.id,
             "subdomain": tenant.subdomain,
             "custom_domain": tenant.custom_domain,
             "company_name": tenant.company_name,
@@ -219,29 +212,67 @@ async def login(
             "secondary_color": tenant.secondary_color
         }
     )
+    
+    db.execute(
+        insert(UserSession).values(
+            user_id=user.id,
+            tenant_id=user.tenant_id,
+            token_hash=token_hash,
+            expires_at=expires_at
+        )
+    )
+    user_id = str(user.id)
+    db.commit()
+    # Tokens from the sessions just removed may still be in the auth cache
+    user_token_cache.invalidate_subject(user_id)
+    
+    logger.info("User logged in: %s for tenant %s", login_data.email, tenant_id)
+    
+    return response
 
 
 @router.post("/logout")
 async def logout(
     request: Request,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    token: str = Depends(get_bearer_token),
     db: Session = Depends(get_db)
 ):
     """
     Logout user (invalidate session)
+    
+    The token is verified locally; the session delete itself proves the session
+    exists, so no separate user/session lookup is needed.
     """
-    # Get current user
-    current_user = get_current_user(request, credentials=credentials.credentials, db=db)
+    tenant_id = get_current_tenant_id(request)
+    payload = decode_access_token(token)
+    
+    user_id = payload.get("user_id")
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token: user_id missing"
+        )
+    if payload.get("tenant_id") != tenant_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token tenant does not match request tenant"
+        )
     
     # Delete session (hash the token to find it)
-    token_hash = hashlib.sha256(credentials.credentials.encode()).hexdigest()
-    db.query(UserSession).filter(
-        UserSession.user_id == current_user.id,
-        UserSession.token_hash == token_hash
-    ).delete()
+    deleted = db.query(UserSession).filter(
+        UserSession.user_id == user_id,
+        UserSession.token_hash == hash_token(token)
+    ).delete(synchronize_session=False)
     db.commit()
+    user_token_cache.invalidate_subject(user_id)
+    
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Session expired or invalid. Please login again."
+        )
     
-    logger.info(f"User logged out: {current_user.email}")
+    logger.info("User logged out: %s", user_id)
     
     return {"message": "Logged out successfully"}
 
@@ -249,16 +280,16 @@ async def logout(
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
     request: Request,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    token: str = Depends(get_bearer_token),
     db: Session = Depends(get_db)
 ):
     """
     Get current authenticated user information
     """
-    user = get_current_user(request, credentials=credentials.credentials, db=db)
+    user = get_current_user(request, credentials=token, db=db)
     
     return UserResponse(
-        id=str(user.id),
+        id=user.id,
         email=user.email,
         first_name=user.first_name,
         last_name=user.last_name,
@@ -268,10 +299,17 @@ async def get_current_user_info(
     )
 
 
+def _store_reset_token(user_id, token_hash: bytes, expires_at: datetime) -> None:
+    """Replace any existing reset tokens for the user with the new one (runs as a background task)"""
+    with get_db_context() as db:
+        UserService.store_password_reset_token(user_id, token_hash, expires_at, db)
+
+
 @router.post("/forgot-password")
 async def forgot_password(
     request: Request,
     body: ForgotPasswordRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
@@ -286,23 +324,14 @@ async def forgot_password(
     if not user or not user.is_active:
         return {"message": "If an account exists with this email, you will receive reset instructions."}
 
-    # Invalidate any existing reset tokens for this user
-    db.query(PasswordResetToken).filter(PasswordResetToken.user_id == user.id).delete()
-
     token = secrets.token_urlsafe(32)
-    token_hash = hashlib.sha256(token.encode()).hexdigest()
-    expires_at = datetime.utcnow() + timedelta(hours=1)
+    expires_at = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1)
 
-    reset_record = PasswordResetToken(
-        user_id=user.id,
-        token_hash=token_hash,
-        expires_at=expires_at
-    )
-    db.add(reset_record)
-    db.commit()
+    # Token storage happens after the response is sent
+    background_tasks.add_task(_store_reset_token, user.id, hash_token_digest(token), expires_at)
 
     reset_link = f"/reset-password?token={token}"
-    logger.info(f"Password reset requested for {user.email}; link (dev): {reset_link}")
+    logger.info("Password reset requested for %s; link (dev): %s", user.email, reset_link)
     return {"message": "If an account exists with this email, you will receive reset instructions.", "reset_link": reset_link}
 
 
@@ -316,10 +345,10 @@ async def reset_password(
     Reset password using the token from the forgot-password email link.
     No tenant context required (token identifies the user).
     """
-    token_hash = hashlib.sha256(body.token.encode()).hexdigest()
-    reset_record = db.query(PasswordResetToken).filter(
+    token_hash = hash_token_digest(body.token)
+    reset_record = db.query(PasswordResetToken.id, PasswordResetToken.user_id).filter(
         PasswordResetToken.token_hash == token_hash,
-        PasswordResetToken.expires_at > datetime.utcnow()
+        PasswordResetToken.expires_at > datetime.now(timezone.utc).replace(tzinfo=None)
     ).first()
 
     if not reset_record:
@@ -332,9 +361,11 @@ async def reset_password(
     if not user or not user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired reset link.")
 
-    user.password_hash = UserService.hash_password(body.new_password)
-    db.delete(reset_record)
+    user.password_hash = await run_in_threadpool(UserService.hash_password, body.new_password)
+    db.query(PasswordResetToken).filter(
+        PasswordResetToken.id == reset_record.id
+    ).delete(synchronize_session=False)
     db.commit()
 
-    logger.info(f"Password reset completed for user {user.id}")
+    logger.info("Password reset completed for user %s", user.id)
     return {"message": "Password has been reset. You can now log in."}
@@ -2,41 +2,89 @@
 Numerology API endpoints
 """
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field, validator
-from typing import Optional
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
+from typing import Dict, Optional, Tuple
 from services.numerology_service import NumerologyService
 from datetime import datetime
+from functools import lru_cache
 import logging
+import re
 
 router = APIRouter()
 service = NumerologyService()
 logger = logging.getLogger(__name__)
 
+# Calculations are pure functions of the birthdate (and year range), so results are
+# memoized per process. Cached values are shared between requests and must be
+# treated as read-only.
+NUMEROLOGY_CACHE_SIZE = 256
+NATAL_CACHE_SIZE = 4096
 
-class NumerologyRequest(BaseModel):
-    """Request model for numerology calculations"""
+
+@lru_cache(maxsize=NUMEROLOGY_CACHE_SIZE)
+def _calculate_numerology_cached(birthdate: str, start_year: Optional[int], end_year: Optional[int]) -> Dict:
+    return service.calculate_numerology(birthdate, start_year=start_year, end_year=end_year)
+
+
+@lru_cache(maxsize=NATAL_CACHE_SIZE)
+def _natal_context(day: int, month: int, year: int) -> Tuple[int, Dict[int, str]]:
+    """Root number and natal grid dict for a birthdate"""
+    root = service.calculate_root_number(day)
+    month_num = service.calculate_month_number(month)
+    year_num = service.calculate_year_number(year)
+    destiny = service.calculate_destiny_number(root, month_num, year_num)
+    natal_digits = service.build_natal_grid_digits(day, month, year, destiny)
+    return root, service.build_natal_grid(natal_digits)
+
+
+_BIRTHDATE_RE = re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})$")
+
+
+@lru_cache(maxsize=NATAL_CACHE_SIZE)
+def _parse_ddmmyyyy(v: str) -> Tuple[int, int, int]:
+    """Parse and range-check a DD/MM/YYYY birthdate, returning (day, month, year)"""
+    match = _BIRTHDATE_RE.match(v.strip())
+    if match is None:
+        raise ValueError("Invalid birthdate format: Birthdate must be in DD/MM/YYYY format")
+    day, month, year = int(match[1]), int(match[2]), int(match[3])
+    if not (1 <= day <= 31):
+        raise ValueError("Invalid birthdate format: Day must be between 1 and 31")
+    if not (1 <= month <= 12):
+        raise ValueError("Invalid birthdate format: Month must be between 1 and 12")
+    if not (1900 <= year <= 2100):
+        raise ValueError("Invalid birthdate format: Year must be between 1900 and 2100")
+    return day, month, year
+
+
+class BirthdateRequest(BaseModel):
+    """Base request model carrying a DD/MM/YYYY birthdate, parsed once during validation"""
     birthdate: str = Field(..., description="Birthdate in DD/MM/YYYY format")
-    start_year: Optional[int] = Field(None, description="Start year for year range (defaults to birth year)")
-    end_year: Optional[int] = Field(None, description="End year for year range (defaults to birth year + 100)")
     
-    @validator('birthdate')
+    _dob_tuple: Tuple[int, int, int] = PrivateAttr()
+    
+    @field_validator('birthdate', mode='after')
+    @classmethod
     def validate_birthdate(cls, v):
-        try:
-            parts = v.split('/')
-            if len(parts) != 3:
-                raise ValueError("Birthdate must be in DD/MM/YYYY format")
-            day, month, year = map(int, parts)
-            if not (1 <= day <= 31):
-                raise ValueError("Day must be between 1 and 31")
-            if not (1 <= month <= 12):
-                raise ValueError("Month must be between 1 and 12")
-            if not (1900 <= year <= 2100):
-                raise ValueError("Year must be between 1900 and 2100")
-            return v
-        except ValueError as e:
-            raise ValueError(f"Invalid birthdate format: {e}")
+        _parse_ddmmyyyy(v)
+        return v
+    
+    def model_post_init(self, __context) -> None:
+        # Already validated above; the parse is memoized, so this is a cache hit
+        self._dob_tuple = _parse_ddmmyyyy(self.birthdate)
+    
+    @property
+    def dob_tuple(self) -> Tuple[int, int, int]:
+        """Parsed (day, month, year) of the birthdate"""
+        return self._dob_tuple
+
+
+class NumerologyRequest(BirthdateRequest):
+    """Request model for numerology calculations"""
+    start_year: Optional[int] = Field(None, description="Start year for year range (defaults to birth year)")
+    end_year: Optional[int] = Field(None, description="End year for year range (defaults to birth year + 100)")
     
-    @validator('start_year', 'end_year')
+    @field_validator('start_year', 'end_year', mode='after')
+    @classmethod
     def validate_year_range(cls, v):
         if v is not None:
             if not (1900 <= v <= 2200):
@@ -44,29 +92,12 @@ class NumerologyRequest(BaseModel):
         return v
 
 
-class MonthlyGridRequest(BaseModel):
+class MonthlyGridRequest(BirthdateRequest):
     """Request model for monthly grid calculations"""
-    birthdate: str = Field(..., description="Birthdate in DD/MM/YYYY format")
     year: int = Field(..., description="Year for which to generate monthly grids")
     
-    @validator('birthdate')
-    def validate_birthdate(cls, v):
-        try:
-            parts = v.split('/')
-            if len(parts) != 3:
-                raise ValueError("Birthdate must be in DD/MM/YYYY format")
-            day, month, year = map(int, parts)
-            if not (1 <= day <= 31):
-                raise ValueError("Day must be between 1 and 31")
-            if not (1 <= month <= 12):
-                raise ValueError("Month must be between 1 and 12")
-            if not (1900 <= year <= 2100):
-                raise ValueError("Year must be between 1900 and 2100")
-            return v
-        except ValueError as e:
-            raise ValueError(f"Invalid birthdate format: {e}")
-    
-    @validator('year')
+    @field_validator('year', mode='after')
+    @classmethod
     def validate_year(cls, v):
         if not (1900 <= v <= 2200):
             raise ValueError("Year must be between 1900 and 2200")
@@ -77,10 +108,10 @@ class MonthlyGridRequest(BaseModel):
 async def calculate_numerology(request: NumerologyRequest):
     """Calculate Root Number, Destiny Number, Natal Grid, Mahadasha, and Antardasha from birthdate"""
     try:
-        result = service.calculate_numerology(
+        result = _calculate_numerology_cached(
             request.birthdate,
-            start_year=request.start_year,
-            end_year=request.end_year
+            request.start_year,
+            request.end_year
         )
         return result
     except ValueError as e:
@@ -96,23 +127,13 @@ async def calculate_numerology(request: NumerologyRequest):
 async def get_monthly_grids(request: MonthlyGridRequest):
     """Generate monthly grids for a specific year"""
     try:
-        # Parse birthdate
-        parts = request.birthdate.split('/')
-        day = int(parts[0])
-        month = int(parts[1])
-        year = int(parts[2])
+        # Birthdate was already parsed during request validation
+        day, month, year = request.dob_tuple
         
         dob_date = datetime(year, month, day)
         
-        # Calculate core numbers to get natal grid
-        root = service.calculate_root_number(day)
-        month_num = service.calculate_month_number(month)
-        year_num = service.calculate_year_number(year)
-        destiny = service.calculate_destiny_number(root, month_num, year_num)
-        
-        # Build Natal grid
-        natal_digits = service.build_natal_grid_digits(day, month, year, destiny)
-        natal_grid_dict = service.build_natal_grid(natal_digits)
+        # Core numbers and natal grid (cached per birthdate)
+        root, natal_grid_dict = _natal_context(day, month, year)
         
         # Generate monthly grids
         monthly_grids = service.generate_monthly_grids(
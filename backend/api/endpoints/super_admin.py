@@ -2,24 +2,25 @@
 Super Admin API endpoints
 """
 from fastapi import APIRouter, HTTPException, Depends, status, Query, Request
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, EmailStr
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, ConfigDict, EmailStr, TypeAdapter
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from typing import Optional, List
+from uuid import UUID
 from database.connection import get_db
 from services.super_admin_service import SuperAdminService
 from services.tenant_service import TenantService
 from services.user_service import UserService
-from utils.dependencies import get_current_super_admin
-from database.models import SuperAdmin, Tenant, PasswordResetToken
-from utils.jwt import create_access_token
+from utils.dependencies import get_current_super_admin, get_bearer_token
+from utils.token_cache import super_admin_token_cache
+from database.models import SuperAdmin, Tenant
+from utils.jwt import create_access_token, hash_token_digest
 from datetime import datetime, timedelta
 import logging
-import hashlib
 import secrets
 
 router = APIRouter()
-security = HTTPBearer()
 logger = logging.getLogger(__name__)
 
 
@@ -32,6 +33,8 @@ class SuperAdminLoginRequest(BaseModel):
 
 class SuperAdminLoginResponse(BaseModel):
     """Super admin login response"""
+    model_config = ConfigDict(frozen=True, from_attributes=True)
+
     access_token: str
     token_type: str = "bearer"
     admin: dict
@@ -39,20 +42,21 @@ class SuperAdminLoginResponse(BaseModel):
 
 class SuperAdminResponse(BaseModel):
     """Super admin information response"""
-    id: str
+    model_config = ConfigDict(frozen=True, from_attributes=True)
+
+    id: UUID
     email: str
     first_name: Optional[str]
     last_name: Optional[str]
     is_active: bool
-    last_login: Optional[str]
-    created_at: str
-
-    class Config:
-        from_attributes = True
+    last_login: Optional[datetime]
+    created_at: datetime
 
 
 class PlatformStatisticsResponse(BaseModel):
     """Platform statistics response"""
+    model_config = ConfigDict(frozen=True, from_attributes=True)
+
     total_tenants: int
     active_tenants: int
     total_users: int
@@ -64,8 +68,10 @@ class PlatformStatisticsResponse(BaseModel):
 
 
 class TenantResponse(BaseModel):
-    """Tenant information response"""
-    id: str
+    """Tenant information response (validated directly from Tenant ORM rows)"""
+    model_config = ConfigDict(frozen=True, from_attributes=True)
+
+    id: UUID
     subdomain: Optional[str]
     custom_domain: Optional[str]
     company_name: str
@@ -74,14 +80,17 @@ class TenantResponse(BaseModel):
     is_active: bool
     subscription_tier: str
     purchased_user_licenses: int
-    created_at: str
+    created_at: datetime
+
 
-    class Config:
-        from_attributes = True
+# Built once; validates a whole list of Tenant rows in a single pydantic-core call
+TENANT_LIST_ADAPTER = TypeAdapter(List[TenantResponse])
 
 
 class TenantListResponse(BaseModel):
     """Paginated tenant list response"""
+    model_config = ConfigDict(frozen=True, from_attributes=True)
+
     tenants: List[TenantResponse]
     total: int
     skip: int
@@ -90,6 +99,8 @@ class TenantListResponse(BaseModel):
 
 class TenantDetailsResponse(BaseModel):
     """Detailed tenant information"""
+    model_config = ConfigDict(frozen=True, from_attributes=True)
+
     tenant: TenantResponse
     user_count: int
     active_sessions: int
@@ -152,10 +163,17 @@ async def super_admin_login(
             detail="Invalid email or password"
         )
 
+    # Upgrade outdated password hashes while we have the plaintext
+    if SuperAdminService.password_needs_rehash(admin.password_hash):
+        admin.password_hash = await run_in_threadpool(SuperAdminService.hash_password, login_data.password)
+
     # Update last login
     admin.last_login = datetime.utcnow()
     db.commit()
 
+    # Drop cached identities from earlier tokens so /me reflects this login
+    super_admin_token_cache.invalidate_subject(str(admin.id))
+
     # Create JWT token (no tenant_id for super admin)
     token_data = {
         "admin_id": str(admin.id),
@@ -164,12 +182,12 @@ async def super_admin_login(
     }
     access_token = create_access_token(data=token_data)
 
-    logger.info(f"Super admin logged in: {admin.email}")
+    logger.info("Super admin logged in: %s", admin.email)
 
     return SuperAdminLoginResponse(
         access_token=access_token,
         admin={
-            "id": str(admin.id),
+            "id": admin.id,
             "email": admin.email,
             "first_name": admin.first_name,
             "last_name": admin.last_name
@@ -180,35 +198,27 @@ async def super_admin_login(
 @router.get("/me", response_model=SuperAdminResponse)
 async def get_current_super_admin_info(
     request: Request,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    token: str = Depends(get_bearer_token),
     db: Session = Depends(get_db)
 ):
     """
     Get current super admin information
     """
-    admin = get_current_super_admin(request, credentials.credentials, db=db)
-
-    return SuperAdminResponse(
-        id=str(admin.id),
-        email=admin.email,
-        first_name=admin.first_name,
-        last_name=admin.last_name,
-        is_active=admin.is_active,
-        last_login=admin.last_login.isoformat() if admin.last_login else None,
-        created_at=admin.created_at.isoformat()
-    )
+    admin = get_current_super_admin(request, token, db=db)
+
+    return SuperAdminResponse.model_validate(admin)
 
 
 @router.get("/statistics", response_model=PlatformStatisticsResponse)
 async def get_platform_statistics(
     request: Request,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    token: str = Depends(get_bearer_token),
     db: Session = Depends(get_db)
 ):
     """
     Get platform-wide statistics
     """
-    get_current_super_admin(request, credentials.credentials, db=db)
+    get_current_super_admin(request, token, db=db)
 
     try:
         stats = SuperAdminService.get_platform_statistics(db)
@@ -225,7 +235,7 @@ async def get_platform_statistics(
 @router.get("/tenants", response_model=TenantListResponse)
 async def list_tenants(
     request: Request,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    token: str = Depends(get_bearer_token),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     search: Optional[str] = Query(None),
@@ -235,7 +245,7 @@ async def list_tenants(
     """
     List all tenants (super admin only)
     """
-    get_current_super_admin(request, credentials.credentials, db=db)
+    get_current_super_admin(request, token, db=db)
 
     result = SuperAdminService.list_tenants(
         skip=skip,
@@ -245,21 +255,7 @@ async def list_tenants(
         db=db
     )
 
-    tenant_responses = [
-        TenantResponse(
-            id=str(tenant.id),
-            subdomain=tenant.subdomain,
-            custom_domain=tenant.custom_domain,
-            company_name=tenant.company_name,
-            contact_email=tenant.contact_email,
-            contact_phone=tenant.contact_phone,
-            is_active=tenant.is_active,
-            subscription_tier=tenant.subscription_tier,
-            purchased_user_licenses=tenant.purchased_user_licenses,
-            created_at=tenant.created_at.isoformat()
-        )
-        for tenant in result["tenants"]
-    ]
+    tenant_responses = TENANT_LIST_ADAPTER.validate_python(result["tenants"], from_attributes=True)
 
     return TenantListResponse(
         tenants=tenant_responses,
@@ -273,14 +269,14 @@ async def list_tenants(
 async def create_tenant(
     request: Request,
     body: CreateTenantRequest,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    token: str = Depends(get_bearer_token),
     db: Session = Depends(get_db)
 ):
     """
     Create a new tenant (super admin only).
     Provide either subdomain or custom_domain (or both).
     """
-    get_current_super_admin(request, credentials.credentials, db=db)
+    get_current_super_admin(request, token, db=db)
 
     if not body.subdomain and not body.custom_domain:
         raise HTTPException(
@@ -300,6 +296,14 @@ async def create_tenant(
             detail="Tenant admin password must be at least 8 characters"
         )
 
+    # Hash the admin password in the threadpool before opening the transaction
+    admin_email = (body.admin_email or body.contact_email).strip()
+    admin_password_hash = None
+    if body.admin_password and admin_email:
+        admin_password_hash = await run_in_threadpool(UserService.hash_password, body.admin_password)
+
+    # Tenant and its admin user are created in one transaction: a single commit, and
+    # a failed admin-user create no longer leaves an orphan tenant behind
     try:
         tenant = TenantService.create_tenant(
             subdomain=body.subdomain,
@@ -308,45 +312,35 @@ async def create_tenant(
             contact_email=body.contact_email,
             contact_phone=body.contact_phone,
             purchased_licenses=body.purchased_user_licenses,
-            db=db
+            db=db,
+            commit=False
         )
 
         # Create first user as tenant admin so they can log in at /tenant-admin/login
-        admin_email = (body.admin_email or body.contact_email).strip()
-        if body.admin_password and admin_email:
-            try:
-                UserService.create_user(
-                    tenant_id=str(tenant.id),
-                    email=admin_email,
-                    password=body.admin_password,
-                    first_name=None,
-                    last_name=None,
-                    is_admin=True,
-                    db=db
-                )
-            except ValueError as e:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=str(e)
-                )
-
-        return TenantResponse(
-            id=str(tenant.id),
-            subdomain=tenant.subdomain,
-            custom_domain=tenant.custom_domain,
-            company_name=tenant.company_name,
-            contact_email=tenant.contact_email,
-            contact_phone=tenant.contact_phone,
-            is_active=tenant.is_active,
-            subscription_tier=tenant.subscription_tier,
-            purchased_user_licenses=tenant.purchased_user_licenses,
-            created_at=tenant.created_at.isoformat()
-        )
+        if admin_password_hash:
+            UserService.create_user(
+                tenant_id=str(tenant.id),
+                email=admin_email,
+                password=body.admin_password,
+                first_name=None,
+                last_name=None,
+                is_admin=True,
+                db=db,
+                commit=False,
+                password_hash=admin_password_hash
+            )
+
+        db.commit()
     except ValueError as e:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    TenantService.clear_host_misses()
+
+    db.refresh(tenant)
+    return TenantResponse.model_validate(tenant)
 
 
 @router.patch("/tenants/{tenant_id}/active", response_model=TenantResponse)
@@ -354,68 +348,52 @@ async def update_tenant_active(
     request: Request,
     tenant_id: str,
     body: UpdateTenantActiveRequest,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    token: str = Depends(get_bearer_token),
     db: Session = Depends(get_db)
 ):
     """
     Activate or deactivate a tenant (super admin only).
     """
-    get_current_super_admin(request, credentials.credentials, db=db)
-
-    tenant = TenantService.get_tenant_by_id(tenant_id, db)
+    get_current_super_admin(request, token, db=db)
+
+    # Single UPDATE ... RETURNING instead of SELECT + UPDATE + refresh SELECT
+    tenant = db.execute(
+        update(Tenant)
+        .where(Tenant.id == tenant_id)
+        .values(is_active=body.is_active)
+        .returning(Tenant)
+    ).scalar_one_or_none()
     if not tenant:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Tenant not found"
         )
 
-    tenant.is_active = body.is_active
+    response = TenantResponse.model_validate(tenant)
     db.commit()
-    db.refresh(tenant)
+    TenantService.invalidate_tenant_cache(tenant_id)
 
-    return TenantResponse(
-        id=str(tenant.id),
-        subdomain=tenant.subdomain,
-        custom_domain=tenant.custom_domain,
-        company_name=tenant.company_name,
-        contact_email=tenant.contact_email,
-        contact_phone=tenant.contact_phone,
-        is_active=tenant.is_active,
-        subscription_tier=tenant.subscription_tier,
-        purchased_user_licenses=tenant.purchased_user_licenses,
-        created_at=tenant.created_at.isoformat()
-    )
+    return response
 
 
 @router.get("/tenants/{tenant_id}", response_model=TenantDetailsResponse)
 async def get_tenant_details(
     request: Request,
     tenant_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    token: str = Depends(get_bearer_token),
     db: Session = Depends(get_db)
 ):
     """
     Get detailed tenant information
     """
-    get_current_super_admin(request, credentials.credentials, db=db)
+    get_current_super_admin(request, token, db=db)
 
     try:
         details = SuperAdminService.get_tenant_details(tenant_id, db)
         tenant = details["tenant"]
 
         return TenantDetailsResponse(
-            tenant=TenantResponse(
-                id=str(tenant.id),
-                subdomain=tenant.subdomain,
-                custom_domain=tenant.custom_domain,
-                company_name=tenant.company_name,
-                contact_email=tenant.contact_email,
-                contact_phone=tenant.contact_phone,
-                is_active=tenant.is_active,
-                subscription_tier=tenant.subscription_tier,
-                purchased_user_licenses=tenant.purchased_user_licenses,
-                created_at=tenant.created_at.isoformat()
-            ),
+            tenant=TenantResponse.model_validate(tenant),
             user_count=details["user_count"],
             active_sessions=details["active_sessions"],
             licenses_used=details["licenses_used"],
@@ -433,14 +411,14 @@ async def send_tenant_user_password_reset(
     request: Request,
     tenant_id: str,
     body: SendPasswordResetRequest,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    token: str = Depends(get_bearer_token),
     db: Session = Depends(get_db)
 ):
     """
     Super Admin: create a password reset link for a user in the given tenant (by email).
     Returns reset_link for dev; in production you would send it by email.
     """
-    get_current_super_admin(request, credentials.credentials, db=db)
+    get_current_super_admin(request, token, db=db)
 
     tenant = TenantService.get_tenant_by_id(tenant_id, db)
     if not tenant:
@@ -453,22 +431,12 @@ async def send_tenant_user_password_reset(
             detail="No active user with this email in this tenant"
         )
 
-    db.query(PasswordResetToken).filter(PasswordResetToken.user_id == user.id).delete()
-
-    token = secrets.token_urlsafe(32)
-    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    reset_token = secrets.token_urlsafe(32)
     expires_at = datetime.utcnow() + timedelta(hours=1)
+    UserService.store_password_reset_token(user.id, hash_token_digest(reset_token), expires_at, db)
 
-    reset_record = PasswordResetToken(
-        user_id=user.id,
-        token_hash=token_hash,
-        expires_at=expires_at
-    )
-    db.add(reset_record)
-    db.commit()
-
-    reset_link = f"/reset-password?token={token}"
-    logger.info(f"Super admin sent password reset for {user.email} (tenant {tenant_id}); link: {reset_link}")
+    reset_link = f"/reset-password?token={reset_token}"
+    logger.info("Super admin sent password reset for %s (tenant %s); link: %s", user.email, tenant_id, reset_link)
     return {"message": "Password reset link created.", "reset_link": reset_link}
 
 
@@ -477,13 +445,13 @@ async def update_tenant_licenses(
     request: Request,
     tenant_id: str,
     licenses_data: UpdateTenantLicensesRequest,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    token: str = Depends(get_bearer_token),
     db: Session = Depends(get_db)
 ):
     """
     Update tenant's purchased licenses
     """
-    get_current_super_admin(request, credentials.credentials, db=db)
+    get_current_super_admin(request, token, db=db)
 
     if licenses_data.licenses_count < 0:
         raise HTTPException(
@@ -498,18 +466,7 @@ async def update_tenant_licenses(
             db
         )
 
-        return TenantResponse(
-            id=str(tenant.id),
-            subdomain=tenant.subdomain,
-            custom_domain=tenant.custom_domain,
-            company_name=tenant.company_name,
-            contact_email=tenant.contact_email,
-            contact_phone=tenant.contact_phone,
-            is_active=tenant.is_active,
-            subscription_tier=tenant.subscription_tier,
-            purchased_user_licenses=tenant.purchased_user_licenses,
-            created_at=tenant.created_at.isoformat()
-        )
+        return TenantResponse.model_validate(tenant)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,31 +1,65 @@
 """
 Tenant Configuration API endpoints
 """
+import hashlib
+import os
+import orjson
 import uuid
 from pathlib import Path
 
 from fastapi import APIRouter, HTTPException, Depends, status, Request, UploadFile, File
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, HttpUrl
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, ConfigDict, HttpUrl
 from sqlalchemy.orm import Session
 from typing import Optional
 from database.connection import get_db
 from services.tenant_service import TenantService
-from utils.dependencies import get_current_tenant_id, get_current_admin_user, get_current_user
+from utils.dependencies import get_current_tenant_id, get_current_admin_user, get_current_user, get_bearer_token
 from middleware.tenant_middleware import get_tenant_from_request
 import logging
 
 router = APIRouter()
-ALLOWED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+ALLOWED_EXTENSIONS = frozenset({".png", ".jpg", ".jpeg", ".gif", ".webp"})
 MAX_LOGO_SIZE = 2 * 1024 * 1024  # 2MB
-security = HTTPBearer()
+UPLOAD_CHUNK_SIZE = 64 * 1024
+LOGO_UPLOAD_DIR = Path(__file__).resolve().parent.parent.parent / "uploads" / "logos"
+LOGO_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 logger = logging.getLogger(__name__)
 
 
+def _sniff_image_extensions(head: bytes) -> set:
+    """Return the file extensions consistent with an image's magic bytes (empty if unrecognised)"""
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return {".png"}
+    if head.startswith(b"\xff\xd8\xff"):
+        return {".jpg", ".jpeg"}
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return {".gif"}
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return {".webp"}
+    return set()
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison, as RFC 9110 requires)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == etag:
+            return True
+    return False
+
+
 # Request/Response Models
 class TenantConfigResponse(BaseModel):
     """Tenant configuration response"""
-    id: str
+    model_config = ConfigDict(frozen=True, from_attributes=True)
+
+    id: uuid.UUID
     subdomain: Optional[str]
     custom_domain: Optional[str]
     company_name: str
@@ -49,29 +83,28 @@ class TenantBrandingUpdateRequest(BaseModel):
 @router.get("/config", response_model=TenantConfigResponse)
 async def get_tenant_config(
     request: Request,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    token: str = Depends(get_bearer_token),
     db: Session = Depends(get_db)
 ):
     """
     Get tenant configuration (authenticated users)
     """
     # Verify user is authenticated
-    get_current_user(request, credentials=credentials.credentials, db=db)
+    get_current_user(request, credentials=token, db=db)
     
     tenant_id = get_current_tenant_id(request)
-    tenant = TenantService.get_tenant_by_id(tenant_id, db)
+    result = TenantService.get_tenant_with_license_usage(tenant_id, db)
     
-    if not tenant:
+    if not result:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Tenant not found"
         )
     
-    # Get license usage
-    license_usage = TenantService.get_license_usage(tenant_id, db)
+    tenant, license_usage = result
     
     return TenantConfigResponse(
-        id=str(tenant.id),
+        id=tenant.id,
         subdomain=tenant.subdomain,
         custom_domain=tenant.custom_domain,
         company_name=tenant.company_name,
@@ -89,14 +122,14 @@ async def get_tenant_config(
 async def update_tenant_branding(
     request: Request,
     branding_data: TenantBrandingUpdateRequest,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    token: str = Depends(get_bearer_token),
     db: Session = Depends(get_db)
 ):
     """
     Update tenant branding (admin only)
     """
     # Verify admin access
-    get_current_admin_user(get_current_user(request, credentials.credentials, db))
+    get_current_admin_user(get_current_user(request, token, db))
     
     tenant_id = get_current_tenant_id(request)
     
@@ -110,13 +143,13 @@ async def update_tenant_branding(
             db=db
         )
         
-        logger.info(f"Tenant branding updated: {tenant_id}")
+        logger.info("Tenant branding updated: %s", tenant_id)
         
         # Get license usage
         license_usage = TenantService.get_license_usage(tenant_id, db)
         
         return TenantConfigResponse(
-            id=str(tenant.id),
+            id=tenant.id,
             subdomain=tenant.subdomain,
             custom_domain=tenant.custom_domain,
             company_name=tenant.company_name,
@@ -139,39 +172,64 @@ async def update_tenant_branding(
 async def upload_tenant_logo(
     request: Request,
     file: UploadFile = File(...),
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    token: str = Depends(get_bearer_token),
     db: Session = Depends(get_db)
 ):
     """
     Upload tenant logo from file (admin only).
     Accepts PNG, JPG, JPEG, GIF, WebP. Max 2MB.
     """
-    get_current_admin_user(get_current_user(request, credentials.credentials, db))
+    get_current_admin_user(get_current_user(request, token, db))
     tenant_id = get_current_tenant_id(request)
     
     # Validate file extension
-    ext = Path(file.filename or "").suffix.lower()
+    filename = file.filename or ""
+    dot = filename.rfind(".")
+    ext = filename[dot:].lower() if dot >= 0 else ""
     if ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
         )
     
-    # Read and validate size
-    content = await file.read()
-    if len(content) > MAX_LOGO_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="File too large. Max 2MB allowed."
-        )
+    # Written under a temporary name; renamed to its content hash once complete
+    filepath = LOGO_UPLOAD_DIR / f".{tenant_id}_{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+    
+    # Stream to disk in chunks (blocking file I/O in the threadpool), checking the
+    # magic bytes of the first chunk and the running size as we go
+    out = await run_in_threadpool(open, filepath, "wb")
+    try:
+        total = 0
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            if total == 0 and ext not in _sniff_image_extensions(chunk):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="File content does not match its image type"
+                )
+            total += len(chunk)
+            if total > MAX_LOGO_SIZE:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="File too large. Max 2MB allowed."
+                )
+            digest.update(chunk)
+            await run_in_threadpool(out.write, chunk)
+        if total == 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Uploaded file is empty"
+            )
+    except BaseException:
+        await run_in_threadpool(out.close)
+        filepath.unlink(missing_ok=True)
+        raise
+    await run_in_threadpool(out.close)
     
-    # Save file
-    uploads_dir = Path(__file__).resolve().parent.parent.parent / "uploads" / "logos"
-    uploads_dir.mkdir(parents=True, exist_ok=True)
-    filename = f"{tenant_id}_{uuid.uuid4().hex[:8]}{ext}"
-    filepath = uploads_dir / filename
-    with open(filepath, "wb") as f:
-        f.write(content)
+    # Content-addressed name: identical uploads share one file, and a URL never
+    # changes content, so it can be cached as immutable
+    filename = f"{digest.hexdigest()[:16]}{ext}"
+    await run_in_threadpool(os.replace, filepath, LOGO_UPLOAD_DIR / filename)
     
     # Update tenant logo_url - store path for frontend to combine with API base URL
     logo_url = f"/static/logos/{filename}"
@@ -187,11 +245,11 @@ async def upload_tenant_logo(
 @router.delete("/logo")
 async def remove_tenant_logo(
     request: Request,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    token: str = Depends(get_bearer_token),
     db: Session = Depends(get_db)
 ):
     """Remove tenant logo (admin only)."""
-    get_current_admin_user(get_current_user(request, credentials.credentials, db))
+    get_current_admin_user(get_current_user(request, token, db))
     tenant_id = get_current_tenant_id(request)
     
     tenant = TenantService.update_tenant_branding(
@@ -219,4 +277,11 @@ async def get_tenant_info(
             detail="Tenant not found"
         )
     
-    return tenant_info
+    # Branding rarely changes and is fetched on every page load, so let the
+    # browser revalidate with If-None-Match and get a bodyless 304 back
+    body = orjson.dumps(tenant_info)
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
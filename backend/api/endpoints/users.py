@@ -1,20 +1,25 @@
 """
 User Management API endpoints (CRUD operations)
 """
-from fastapi import APIRouter, HTTPException, Depends, status, Query, Request
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, EmailStr
+from fastapi import APIRouter, HTTPException, Depends, status, Query
+from fastapi.responses import Response
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, TypeAdapter
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, Tuple
+from datetime import datetime
+from uuid import UUID
 from database.connection import get_db
-from services.user_service import UserService
-from utils.dependencies import get_current_tenant_id, get_current_user, get_current_admin_user
+from services.user_service import UserService, UserSnapshot
+from utils.dependencies import require_user_and_tenant, require_admin_and_tenant
 from database.models import User
 import logging
+import orjson
 
+# Handlers here are plain `def`: they make blocking Session calls (and hash
+# passwords), so FastAPI runs them in its threadpool instead of on the event loop
 router = APIRouter()
-security = HTTPBearer()
 logger = logging.getLogger(__name__)
+MAX_BATCH_USERS = 500
 
 
 # Request/Response Models
@@ -27,6 +32,11 @@ class UserCreateRequest(BaseModel):
     is_admin: bool = False
 
 
+class UserBatchCreateRequest(BaseModel):
+    """Create many users at once"""
+    users: List[UserCreateRequest] = Field(..., min_length=1, max_length=MAX_BATCH_USERS)
+
+
 class UserUpdateRequest(BaseModel):
     """Update user request"""
     email: Optional[EmailStr] = None
@@ -38,91 +48,81 @@ class UserUpdateRequest(BaseModel):
 
 class UserResponse(BaseModel):
     """User information response"""
-    id: str
+    model_config = ConfigDict(frozen=True, from_attributes=True)
+
+    id: UUID
     email: str
     first_name: Optional[str]
     last_name: Optional[str]
     is_admin: bool
     is_active: bool
-    last_login: Optional[str]
-    created_at: str
-    
-    class Config:
-        from_attributes = True
+    last_login: Optional[datetime]
+    created_at: datetime
+
+
+# Built once; validates a whole page of User rows in a single pydantic-core call
+USER_LIST_ADAPTER = TypeAdapter(List[UserResponse])
+
+
+class UserBatchCreateResponse(BaseModel):
+    """Batch create result: created users and the emails skipped as duplicates"""
+    created: List[UserResponse]
+    skipped: List[str]
 
 
 class UserListResponse(BaseModel):
     """Paginated user list response"""
     users: List[UserResponse]
-    total: int
-    skip: int
+    next_cursor: Optional[str]
     limit: int
 
 
 @router.get("", response_model=UserListResponse)
-async def list_users(
-    request: Request,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    skip: int = Query(0, ge=0),
+def list_users(
+    auth: Tuple[UserSnapshot, str] = Depends(require_admin_and_tenant),
+    cursor: Optional[str] = Query(None),
     limit: int = Query(100, ge=1, le=1000),
     search: Optional[str] = Query(None),
     is_active: Optional[bool] = Query(None),
     db: Session = Depends(get_db)
 ):
     """
-    List users for the current tenant (admin only)
+    List users for the current tenant (admin only), newest first.
+    Pass next_cursor from the previous page as cursor to fetch the next one.
     """
-    # Verify admin access
-    get_current_admin_user(get_current_user(request, credentials=credentials.credentials, db=db))
-    
-    # Get tenant_id
-    tenant_id = get_current_tenant_id(request)
-    
-    # Get users
-    result = UserService.list_users(
-        tenant_id=tenant_id,
-        skip=skip,
-        limit=limit,
-        search=search,
-        is_active=is_active,
-        db=db
-    )
+    _, tenant_id = auth
     
-    # Convert to response models
-    user_responses = [
-        UserResponse(
-            id=str(user.id),
-            email=user.email,
-            first_name=user.first_name,
-            last_name=user.last_name,
-            is_admin=user.is_admin,
-            is_active=user.is_active,
-            last_login=user.last_login.isoformat() if user.last_login else None,
-            created_at=user.created_at.isoformat()
+    # Postgres renders the page as JSON; it is spliced into the response as-is
+    try:
+        users_json, next_cursor = UserService.list_users_json(
+            tenant_id=tenant_id,
+            cursor=cursor,
+            limit=limit,
+            search=search,
+            is_active=is_active,
+            db=db
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
-        for user in result["users"]
-    ]
     
-    return UserListResponse(
-        users=user_responses,
-        total=result["total"],
-        skip=result["skip"],
-        limit=result["limit"]
-    )
+    # response_model still documents the shape; returning a Response skips re-validation
+    body = b'{"users":%s,"next_cursor":%s,"limit":%d}' % (users_json.encode(), orjson.dumps(next_cursor), limit)
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(
-    request: Request,
+def get_user(
     user_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    auth: Tuple[UserSnapshot, str] = Depends(require_user_and_tenant),
     db: Session = Depends(get_db)
 ):
     """
     Get user by ID (admin only, or own user)
     """
-    current_user = get_current_user(request, credentials=credentials.credentials, db=db)
-    tenant_id = get_current_tenant_id(request)
+    current_user, tenant_id = auth
     
     # Allow access if user is admin or accessing own profile
     if not current_user.is_admin and str(current_user.id) != user_id:
@@ -138,32 +138,19 @@ async def get_user(
             detail="User not found"
         )
     
-    return UserResponse(
-        id=str(user.id),
-        email=user.email,
-        first_name=user.first_name,
-        last_name=user.last_name,
-        is_admin=user.is_admin,
-        is_active=user.is_active,
-        last_login=user.last_login.isoformat() if user.last_login else None,
-        created_at=user.created_at.isoformat()
-    )
+    return UserResponse.model_validate(user)
 
 
 @router.post("", status_code=status.HTTP_201_CREATED, response_model=UserResponse)
-async def create_user(
-    request: Request,
+def create_user(
     user_data: UserCreateRequest,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    auth: Tuple[UserSnapshot, str] = Depends(require_admin_and_tenant),
     db: Session = Depends(get_db)
 ):
     """
     Create a new user (admin only)
     """
-    # Verify admin access
-    get_current_admin_user(get_current_user(request, credentials=credentials.credentials, db=db))
-    
-    tenant_id = get_current_tenant_id(request)
+    _, tenant_id = auth
     
     try:
         user = UserService.create_user(
@@ -178,36 +165,58 @@ async def create_user(
         
         logger.info(f"User created: {user.email} by admin")
         
-        return UserResponse(
-            id=str(user.id),
-            email=user.email,
-            first_name=user.first_name,
-            last_name=user.last_name,
-            is_admin=user.is_admin,
-            is_active=user.is_active,
-            last_login=None,
-            created_at=user.created_at.isoformat()
+        return UserResponse.model_validate(user)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post("/batch", status_code=status.HTTP_201_CREATED, response_model=UserBatchCreateResponse)
+def create_users_batch(
+    batch: UserBatchCreateRequest,
+    auth: Tuple[UserSnapshot, str] = Depends(require_admin_and_tenant),
+    db: Session = Depends(get_db)
+):
+    """
+    Create up to MAX_BATCH_USERS users in one request (admin only).
+    Emails that already exist are skipped; the batch fails as a whole only if
+    it would exceed the tenant's licenses.
+    """
+    _, tenant_id = auth
+    
+    try:
+        result = UserService.create_users_bulk(
+            tenant_id=tenant_id,
+            users=[user.model_dump() for user in batch.users],
+            db=db
         )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    
+    logger.info("Batch created %s users by admin", len(result["created"]))
+    
+    return UserBatchCreateResponse(
+        created=USER_LIST_ADAPTER.validate_python(result["created"], from_attributes=True),
+        skipped=result["skipped"]
+    )
 
 
 @router.put("/{user_id}", response_model=UserResponse)
-async def update_user(
-    request: Request,
+def update_user(
     user_id: str,
     user_data: UserUpdateRequest,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    auth: Tuple[UserSnapshot, str] = Depends(require_user_and_tenant),
     db: Session = Depends(get_db)
 ):
     """
     Update user (admin only, or own user for non-admin fields)
     """
-    current_user = get_current_user(request, credentials=credentials.credentials, db=db)
-    tenant_id = get_current_tenant_id(request)
+    current_user, tenant_id = auth
     
     # Check permissions
     if not current_user.is_admin and str(current_user.id) != user_id:
@@ -243,16 +252,7 @@ async def update_user(
         
         logger.info(f"User updated: {user_id}")
         
-        return UserResponse(
-            id=str(user.id),
-            email=user.email,
-            first_name=user.first_name,
-            last_name=user.last_name,
-            is_admin=user.is_admin,
-            is_active=user.is_active,
-            last_login=user.last_login.isoformat() if user.last_login else None,
-            created_at=user.created_at.isoformat()
-        )
+        return UserResponse.model_validate(user)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -261,19 +261,15 @@ async def update_user(
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_user(
-    request: Request,
+def delete_user(
     user_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    auth: Tuple[UserSnapshot, str] = Depends(require_admin_and_tenant),
     db: Session = Depends(get_db)
 ):
     """
     Delete user (admin only, cannot delete self)
     """
-    current_user = get_current_admin_user(
-        get_current_user(request, credentials.credentials, db)
-    )
-    tenant_id = get_current_tenant_id(request)
+    current_user, tenant_id = auth
     
     # Prevent self-deletion
     if str(current_user.id) == user_id:
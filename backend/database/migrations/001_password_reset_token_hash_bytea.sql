@@ -0,0 +1,16 @@
+-- Store password reset token hashes as raw SHA-256 digests (32 bytes) instead of hex text.
+-- Safe to re-run: only converts the column while it is still text.
+-- Run as the table owner (e.g. postgres), same as schema.sql.
+
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'password_reset_tokens'
+          AND column_name = 'token_hash'
+          AND data_type <> 'bytea'
+    ) THEN
+        ALTER TABLE password_reset_tokens
+            ALTER COLUMN token_hash TYPE BYTEA USING decode(token_hash, 'hex');
+    END IF;
+END $$;
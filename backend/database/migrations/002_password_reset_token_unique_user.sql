@@ -0,0 +1,14 @@
+-- One password reset token per user: lets the app replace a user's token with a
+-- single INSERT ... ON CONFLICT (user_id) DO UPDATE.
+-- Safe to re-run. Run as the table owner (e.g. postgres), same as schema.sql.
+
+-- Keep only the newest token per user before adding the constraint
+DELETE FROM password_reset_tokens t
+USING password_reset_tokens newer
+WHERE t.user_id = newer.user_id
+  AND (t.created_at, t.id) < (newer.created_at, newer.id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS password_reset_tokens_user_id_key ON password_reset_tokens(user_id);
+
+-- Superseded by the unique index
+DROP INDEX IF EXISTS idx_password_reset_tokens_user_id;
@@ -0,0 +1,10 @@
+-- Trigram GIN indexes so the super admin tenant search (ILIKE '%term%' on
+-- company_name / contact_email / subdomain / custom_domain) can use an index.
+-- Safe to re-run. Run as postgres (creating the extension needs superuser).
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_tenants_company_name_trgm ON tenants USING gin (company_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_tenants_contact_email_trgm ON tenants USING gin (contact_email gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_tenants_subdomain_trgm ON tenants USING gin (subdomain gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_tenants_custom_domain_trgm ON tenants USING gin (custom_domain gin_trgm_ops);
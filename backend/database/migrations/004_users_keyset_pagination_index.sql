@@ -0,0 +1,5 @@
+-- Composite index backing keyset pagination of GET /api/v1/users
+-- (WHERE tenant_id = ? AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC).
+-- Safe to re-run.
+
+CREATE INDEX IF NOT EXISTS idx_users_tenant_created_id ON users (tenant_id, created_at DESC, id DESC);
@@ -0,0 +1,8 @@
+-- Case-insensitive per-tenant email uniqueness (user inserts use it as their
+-- ON CONFLICT target) and an index for the is_active-filtered user list.
+-- Safe to re-run. The unique index fails to build if a tenant already has two
+-- users whose emails differ only by case; resolve those first:
+--   SELECT tenant_id, lower(email), count(*) FROM users GROUP BY 1, 2 HAVING count(*) > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_tenant_email_lower ON users (tenant_id, lower(email));
+CREATE INDEX IF NOT EXISTS idx_users_tenant_active_created_id ON users (tenant_id, is_active, created_at DESC, id DESC);
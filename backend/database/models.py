@@ -1,15 +1,34 @@
 """
 Database models for Numerology MSP Multi-Tenant System
 """
-from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey, DECIMAL, Text, CheckConstraint
+from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey, DECIMAL, Text, CheckConstraint, LargeBinary, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
+import os
+import time
 import uuid
 from .connection import Base
 
 
+def uuid7() -> uuid.UUID:
+    """
+    Time-ordered UUID (RFC 9562 version 7): 48-bit Unix milliseconds, then random bits.
+    Used for high-insert tables so new keys land at the right edge of their B-tree
+    indexes instead of on random pages.
+    """
+    unix_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    return uuid.UUID(int=(
+        (unix_ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76                          # version
+        | (rand >> 62 & 0xFFF) << 64         # rand_a
+        | 0b10 << 62                         # variant
+        | (rand & 0x3FFF_FFFF_FFFF_FFFF)     # rand_b
+    ))
+
+
 class Tenant(Base):
     """MSP Organization (Tenant)"""
     __tablename__ = "tenants"
@@ -50,7 +69,7 @@ class User(Base):
     """End user within an MSP tenant"""
     __tablename__ = "users"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False)
     email = Column(String(255), nullable=False)
     password_hash = Column(String(255), nullable=False)
@@ -68,6 +87,15 @@ class User(Base):
     password_reset_tokens = relationship("PasswordResetToken", back_populates="user", cascade="all, delete-orphan")
 
     __table_args__ = (
+        # Keyset pagination for the tenant user list (newest first)
+        Index("idx_users_tenant_created_id", "tenant_id", created_at.desc(), id.desc()),
+        # Same as UNIQUE(tenant_id, email) in schema.sql
+        UniqueConstraint("tenant_id", "email"),
+        # Emails are unique per tenant regardless of case; user inserts use this as
+        # their ON CONFLICT target instead of checking for the email first
+        Index("idx_users_tenant_email_lower", "tenant_id", func.lower(email), unique=True),
+        # Keyset pagination of the user list filtered by is_active
+        Index("idx_users_tenant_active_created_id", "tenant_id", "is_active", created_at.desc(), id.desc()),
         {'extend_existing': True},
     )
 
@@ -79,7 +107,7 @@ class UserSession(Base):
     """JWT session tracking"""
     __tablename__ = "user_sessions"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False)
     token_hash = Column(String(255), nullable=False)
@@ -90,6 +118,11 @@ class UserSession(Base):
     user = relationship("User", back_populates="sessions")
     tenant = relationship("Tenant", back_populates="sessions")
 
+    __table_args__ = (
+        # Auth lookup (user joined to the session for this token) and logout delete
+        Index("idx_sessions_user_id_token_hash", "user_id", "token_hash"),
+    )
+
     def __repr__(self):
         return f"<UserSession(id={self.id}, user_id={self.user_id}, expires_at={self.expires_at})>"
 
@@ -98,9 +131,9 @@ class PasswordResetToken(Base):
     """Password reset token (for users and tenant admins)"""
     __tablename__ = "password_reset_tokens"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    token_hash = Column(String(255), nullable=False)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, unique=True)
+    token_hash = Column(LargeBinary(32), nullable=False)  # raw SHA-256 digest
     expires_at = Column(DateTime, nullable=False)
     created_at = Column(DateTime, server_default=func.now())
 
@@ -115,7 +148,7 @@ class TenantLicense(Base):
     """License tracking for tenants"""
     __tablename__ = "tenant_licenses"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False)
     licenses_purchased = Column(Integer, nullable=False)
     licenses_used = Column(Integer, default=0)
@@ -135,7 +168,7 @@ class LicensePurchase(Base):
     """License purchase history"""
     __tablename__ = "license_purchases"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False)
     licenses_count = Column(Integer, nullable=False)
     amount = Column(DECIMAL(10, 2), nullable=False)
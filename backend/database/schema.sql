@@ -30,6 +30,13 @@ CREATE INDEX IF NOT EXISTS idx_tenants_subdomain ON tenants(subdomain);
 CREATE INDEX IF NOT EXISTS idx_tenants_custom_domain ON tenants(custom_domain);
 CREATE INDEX IF NOT EXISTS idx_tenants_is_active ON tenants(is_active);
 
+-- Trigram indexes for the super admin tenant search (ILIKE '%term%')
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_tenants_company_name_trgm ON tenants USING gin (company_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_tenants_contact_email_trgm ON tenants USING gin (contact_email gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_tenants_subdomain_trgm ON tenants USING gin (subdomain gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_tenants_custom_domain_trgm ON tenants USING gin (custom_domain gin_trgm_ops);
+
 -- Users table (End users within each MSP)
 CREATE TABLE IF NOT EXISTS users (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -50,6 +57,9 @@ CREATE INDEX IF NOT EXISTS idx_users_tenant_id ON users(tenant_id);
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_users_is_active ON users(is_active);
 CREATE INDEX IF NOT EXISTS idx_users_is_admin ON users(is_admin);
+CREATE INDEX IF NOT EXISTS idx_users_tenant_created_id ON users(tenant_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_users_tenant_active_created_id ON users(tenant_id, is_active, created_at DESC, id DESC);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_tenant_email_lower ON users(tenant_id, lower(email));
 
 -- User sessions table (JWT session tracking)
 CREATE TABLE IF NOT EXISTS user_sessions (
@@ -64,17 +74,18 @@ CREATE TABLE IF NOT EXISTS user_sessions (
 CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON user_sessions(user_id);
 CREATE INDEX IF NOT EXISTS idx_sessions_tenant_id ON user_sessions(tenant_id);
 CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON user_sessions(expires_at);
+-- Covers logout / session validation lookups by (user_id, token_hash)
+CREATE INDEX IF NOT EXISTS idx_sessions_user_id_token_hash ON user_sessions(user_id, token_hash);
 
 -- Password reset tokens (for users and tenant admins)
 CREATE TABLE IF NOT EXISTS password_reset_tokens (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
-    token_hash VARCHAR(255) NOT NULL,
+    user_id UUID NOT NULL UNIQUE REFERENCES users(id) ON DELETE CASCADE,  -- one active reset token per user
+    token_hash BYTEA NOT NULL,  -- raw SHA-256 digest (see migrations/001_password_reset_token_hash_bytea.sql)
     expires_at TIMESTAMP NOT NULL,
     created_at TIMESTAMP DEFAULT NOW()
 );
 
-CREATE INDEX IF NOT EXISTS idx_password_reset_tokens_user_id ON password_reset_tokens(user_id);
 CREATE INDEX IF NOT EXISTS idx_password_reset_tokens_token_hash ON password_reset_tokens(token_hash);
 CREATE INDEX IF NOT EXISTS idx_password_reset_tokens_expires_at ON password_reset_tokens(expires_at);
 
@@ -8,9 +8,10 @@ load_dotenv()
 from pathlib import Path
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from api.endpoints import numerology, auth, users, tenant, super_admin
-from middleware.tenant_middleware import TenantMiddleware
+from middleware.tenant_middleware import TenantMiddleware, load_dev_default_tenant
 from database.connection import init_db
 import logging
 
@@ -22,7 +23,9 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Numerology Calculator API",
     description="API for calculating numerology values including Root Number, Destiny Number, Natal Grid, Mahadasha, and Antardasha",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson serializes UUID/datetime natively and much faster than stdlib json
+    default_response_class=ORJSONResponse
 )
 
 # Initialize database on startup
@@ -34,6 +37,7 @@ async def startup_event():
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Error initializing database: {e}")
+    load_dev_default_tenant()
 
 # Tenant middleware (must be before CORS)
 app.add_middleware(TenantMiddleware)
@@ -2,10 +2,13 @@
 Tenant Middleware - Extract tenant from domain (subdomain or custom domain)
 """
 import os
+import re
 from fastapi import Request
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 from database.connection import SessionLocal
-from services.tenant_service import TenantService
+from database.models import Tenant
+from services.tenant_service import TenantService, TenantSnapshot
 from typing import Optional
 import logging
 
@@ -18,6 +21,23 @@ SUBDOMAIN_BASE_DOMAIN = os.getenv("SUBDOMAIN_BASE_DOMAIN", "numerologyapp.com").
 # Subdomain reserved for Super Admin only (no tenant). Set ADMIN_SUBDOMAIN in .env; default "admin".
 ADMIN_SUBDOMAIN = os.getenv("ADMIN_SUBDOMAIN", "admin").strip().lower()
 
+# Outside production, requests to localhost/127.0.0.1 that match no tenant fall back to
+# the first active tenant. It is looked up once at startup (load_dev_default_tenant),
+# so restart the server after creating the first tenant in a fresh dev database.
+DEV_TENANT_FALLBACK = os.getenv("ENV", "development").strip().lower() != "production"
+_dev_default_tenant: Optional[TenantSnapshot] = None
+
+# Requests that never need a tenant: health/docs/root, super-admin API, uploaded static
+# files, and OPTIONS (preflights carry no credentials)
+_SKIP_PATHS = frozenset({"/", "/health", "/docs", "/openapi.json", "/redoc", "/favicon.ico"})
+_SKIP_PREFIXES = ("/api/v1/super-admin", "/static/")
+
+# Host header -> host without port, plus the subdomain label when the host is
+# <sub>.<SUBDOMAIN_BASE_DOMAIN> or (dev) <sub>.localhost. Matched against the lowercased header.
+_HOST_RE = re.compile(
+    rf"^(?P<host>(?P<sub>[a-z0-9-]+)\.(?:{re.escape(SUBDOMAIN_BASE_DOMAIN)}|localhost)|[^:]*)(?::\d*)?$"
+)
+
 
 class TenantMiddleware(BaseHTTPMiddleware):
     """
@@ -29,90 +49,99 @@ class TenantMiddleware(BaseHTTPMiddleware):
     """
 
     async def dispatch(self, request: Request, call_next):
-        # Skip middleware for health check, docs, and super-admin (no tenant required)
-        if request.url.path in ["/health", "/docs", "/openapi.json", "/redoc"]:
-            return await call_next(request)
-        if request.url.path.startswith("/api/v1/super-admin"):
+        # Skip tenant resolution where no tenant is required
+        path = request.url.path
+        if request.method == "OPTIONS" or path in _SKIP_PATHS or path.startswith(_SKIP_PREFIXES):
             return await call_next(request)
 
-        # Get host from request (strip port)
-        host_header = request.headers.get("host", "")
-        host = host_header.split(":")[0].lower() if host_header else ""
+        # Get host from request (strip port) and its subdomain, if any
+        match = _HOST_RE.match(request.headers.get("host", "").lower())
+        host = match["host"] if match else ""
         if not host:
             return await call_next(request)
 
-        tenant = None
-        base = f".{SUBDOMAIN_BASE_DOMAIN}"
-
-        # Subdomain: host must be something like acme.yourdomain.com
-        if host.endswith(base) and host != base.lstrip("."):
-            subdomain = host[: -len(base)].strip(".") or host.split(".")[0]
-            # Admin subdomain: Super Admin only, no tenant
-            if subdomain == ADMIN_SUBDOMAIN:
-                request.state.tenant = None
-                request.state.tenant_id = None
-                return await call_next(request)
-            db = SessionLocal()
-            try:
-                tenant = TenantService.get_tenant_by_subdomain(subdomain, db)
-            except Exception as e:
-                logger.error(f"Error fetching tenant by subdomain: {e}")
-            finally:
-                db.close()
-        # Dev: *.localhost (e.g. senha.localhost) -> resolve by subdomain
-        elif host.endswith(".localhost") and host != "localhost":
-            subdomain = host[: -len(".localhost")].strip(".")
-            if subdomain:
-                db = SessionLocal()
-                try:
-                    tenant = TenantService.get_tenant_by_subdomain(subdomain, db)
-                    if tenant:
-                        logger.debug(f"Resolved tenant by *.localhost: {tenant.company_name} for host {host}")
-                except Exception as e:
-                    logger.debug(f"Tenant by .localhost subdomain: {e}")
-                finally:
-                    db.close()
-        if not tenant:
-            # Custom domain: use full hostname
-            db = SessionLocal()
-            try:
-                tenant = TenantService.get_tenant_by_custom_domain(host, db)
-            except Exception as e:
-                logger.error(f"Error fetching tenant by custom domain: {e}")
-            finally:
-                db.close()
-
-        # If tenant not found: on localhost/127.0.0.1 use first active tenant for dev
-        if not tenant:
-            if host in ("localhost", "127.0.0.1"):
-                db = SessionLocal()
-                try:
-                    from database.models import Tenant as TenantModel
-                    first = db.query(TenantModel).filter(TenantModel.is_active == True).order_by(TenantModel.created_at.asc()).first()
-                    if first:
-                        tenant = first
-                        logger.info(f"Dev fallback: using tenant {tenant.company_name} ({tenant.id}) for host {host}")
-                except Exception as e:
-                    logger.debug(f"Dev tenant fallback skipped: {e}")
-                finally:
-                    db.close()
-            if not tenant:
-                logger.warning(f"Tenant not found for host: {host}")
-                request.state.tenant = None
-                request.state.tenant_id = None
-            else:
-                request.state.tenant = tenant
-                request.state.tenant_id = str(tenant.id)
+        # Hosts resolved recently skip the DB lookups below (only found tenants are cached;
+        # entries are dropped when the tenant's branding or active flag changes)
+        tenant = TenantService.get_cached_host_tenant(host)
         if tenant:
             request.state.tenant = tenant
             request.state.tenant_id = str(tenant.id)
-            logger.debug(f"Tenant resolved: {tenant.id} ({tenant.company_name}) for host: {host}")
+            return await call_next(request)
+        # Likewise for hosts that just failed to resolve
+        if TenantService.is_host_miss_cached(host):
+            request.state.tenant = None
+            request.state.tenant_id = None
+            return await call_next(request)
+
+        # Subdomain: acme.yourdomain.com, or acme.localhost in dev; anything else is
+        # looked up as a custom domain
+        subdomain = match["sub"]
+        # Admin subdomain: Super Admin only, no tenant
+        if subdomain == ADMIN_SUBDOMAIN:
+            request.state.tenant = None
+            request.state.tenant_id = None
+            return await call_next(request)
+
+        # Blocking DB lookups run in the threadpool, off the event loop
+        tenant = await run_in_threadpool(_lookup_tenant, host, subdomain)
+        if tenant:
+            request.state.tenant = tenant
+            request.state.tenant_id = str(tenant.id)
+            logger.debug("Tenant resolved: %s (%s) for host: %s", tenant.id, tenant.company_name, host)
+        else:
+            logger.warning("Tenant not found for host: %s", host)
+            request.state.tenant = None
+            request.state.tenant_id = None
 
         # Continue with request
         response = await call_next(request)
         return response
 
 
+def load_dev_default_tenant() -> None:
+    """Resolve the localhost dev fallback tenant (first active tenant); call once at startup"""
+    global _dev_default_tenant
+    if not DEV_TENANT_FALLBACK:
+        return
+    db = SessionLocal()
+    try:
+        tenant = db.query(Tenant).filter(Tenant.is_active == True).order_by(Tenant.created_at.asc()).first()
+        if tenant:
+            _dev_default_tenant = TenantSnapshot.from_tenant(tenant)
+            logger.info("Dev fallback: localhost requests use tenant %s (%s)", tenant.company_name, tenant.id)
+    except Exception as e:
+        logger.debug("Dev tenant fallback skipped: %s", e)
+    finally:
+        db.close()
+
+
+def _lookup_tenant(host: str, subdomain: Optional[str]):
+    """
+    Resolve a host to a tenant snapshot: by subdomain, then custom domain, then (on
+    localhost/127.0.0.1) the dev default tenant. All lookups share one session,
+    which only checks out a connection when the first query runs.
+    """
+    db = SessionLocal()
+    try:
+        tenant = None
+        if subdomain:
+            tenant = TenantService.get_tenant_by_subdomain(subdomain, db)
+        if not tenant:
+            # Custom domain: use full hostname
+            tenant = TenantService.get_tenant_by_custom_domain(host, db)
+        if not tenant and host in ("localhost", "127.0.0.1"):
+            tenant = _dev_default_tenant
+        if not tenant:
+            TenantService.cache_host_miss(host)
+            return None
+        return TenantService.cache_host_tenant(host, tenant)
+    except Exception as e:
+        logger.error("Error resolving tenant for host %s: %s", host, e)
+        return None
+    finally:
+        db.close()
+
+
 def get_tenant_from_request(request: Request) -> Optional[dict]:
     """Helper function to get tenant from request state"""
     tenant = getattr(request.state, 'tenant', None)
@@ -0,0 +1,28 @@
+"""
+Shared setup for the backend scripts: put the backend root on sys.path and
+load backend/.env once, without changing the caller's working directory.
+"""
+import os
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+
+
+@lru_cache(maxsize=None)
+def ensure_on_path():
+    """Make backend packages (database, services, ...) importable, set up for one-shot use"""
+    os.environ.setdefault("SCRIPT_MODE", "1")  # database.connection then uses NullPool
+    root = str(BACKEND_ROOT)
+    if root not in sys.path:
+        sys.path.insert(0, root)
+
+
+@lru_cache(maxsize=None)
+def load_env():
+    """Load backend/.env; the sentinel stops child processes from parsing it again"""
+    if "NUMEROLOGY_ENV_LOADED" not in os.environ:
+        from dotenv import load_dotenv
+        load_dotenv(BACKEND_ROOT / ".env", override=False)
+        os.environ["NUMEROLOGY_ENV_LOADED"] = "1"
@@ -4,74 +4,129 @@ Create the first Super Admin.
 Run from backend directory:
   python scripts/create_super_admin.py --email YOUR_EMAIL --password YOUR_PASSWORD
   or: python scripts/create_super_admin.py <email> <password>
+  or: python scripts/create_super_admin.py <email>   (prompts for the password)
 """
 import argparse
-import os
+import getpass
+import socket
 import sys
 
-# Ensure backend root is on path and load .env
-backend_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-if backend_root not in sys.path:
-    sys.path.insert(0, backend_root)
-os.chdir(backend_root)
-from dotenv import load_dotenv
-load_dotenv()
 
-def main():
+def _print_connection_help():
+    print("PostgreSQL is not running or not reachable at localhost:5432.")
+    print("Start PostgreSQL first, then run this script again.")
+    print("  Windows: Open Services, start 'postgresql-x64-XX'; or run: net start postgresql-x64-16")
+    print("  Or start from Start Menu if you installed PostgreSQL with the stack builder.")
+
+
+def _print_auth_help():
+    print("PostgreSQL rejected the username or password in your .env file.")
+    print("  - Check backend/.env: DATABASE_URL must match your real PostgreSQL user and password.")
+    print("  - User in the error is the one in the URL (e.g. snehanumerology).")
+    print("  - If the password has special characters (@ # % & etc), use URL encoding:")
+    print("    @ -> %40   # -> %23   % -> %25   & -> %26")
+    print("  - Or reset the DB user password in PostgreSQL to match what you put in .env.")
+
+
+def _print_nologin_help():
+    print("The PostgreSQL role in your .env exists but is not allowed to log in.")
+    print("In psql as postgres, run (replace numerology_app if different):")
+    print("  ALTER ROLE numerology_app LOGIN;")
+    print("Then set a password if needed:")
+    print("  ALTER ROLE numerology_app WITH PASSWORD 'YourPassword';")
+
+
+def _print_grants_help():
+    print("The app user does not have permission on the database tables.")
+    print("Run grants as postgres: psql -U postgres -d numerology_msp -f backend/database/grants.sql")
+    print("(Replace numerology_app in grants.sql with your DATABASE_URL username if different.)")
+
+
+_MESSAGE_HELP = (
+    (("connection refused", "10061"), _print_connection_help),
+    (("password authentication failed",), _print_auth_help),
+    (("not permitted to log in",), _print_nologin_help),
+    (("permission denied",), _print_grants_help),
+)
+
+
+def _database_reachable(host, port) -> bool:
+    """False only when the DB host is definitely unreachable (refused or unresolvable)"""
+    if not host or host.startswith("/"):
+        return True  # Unix socket; let the driver report problems
+    try:
+        socket.create_connection((host, port), timeout=1.0).close()
+    except (ConnectionRefusedError, socket.gaierror):
+        return False
+    except OSError:
+        pass  # Slow or filtered network: the real connect gets its full timeout
+    return True
+
+
+def _db_error_help(e):
+    """Pick the help text for a database error, or None if it is not a setup problem"""
+    from psycopg2 import errorcodes
+
+    # Errors raised by the server carry a SQLSTATE; connect-time failures come from
+    # libpq without one, so those fall back to matching the message
+    pgcode_help = {
+        errorcodes.INVALID_PASSWORD: _print_auth_help,
+        errorcodes.INVALID_AUTHORIZATION_SPECIFICATION: _print_nologin_help,
+        errorcodes.INSUFFICIENT_PRIVILEGE: _print_grants_help,
+    }
+    handler = pgcode_help.get(getattr(e.orig, "pgcode", None))
+    if handler is None:
+        err = str(e.orig).lower()
+        handler = next((h for needles, h in _MESSAGE_HELP if any(n in err for n in needles)), None)
+    return handler
+
+
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Create the first Super Admin user.")
     parser.add_argument("--email", "-e", help="Super Admin email")
     parser.add_argument("--password", "-p", help="Super Admin password")
     parser.add_argument("email_pos", nargs="?", help="Email (positional)")
     parser.add_argument("password_pos", nargs="?", help="Password (positional)")
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     email = (args.email or args.email_pos or "").strip()
     password = args.password or args.password_pos
+    if email and not password and sys.stdin.isatty():
+        # Prompt rather than take it on argv: keeps it out of shell history and needs no escaping
+        password = getpass.getpass("Password: ")
     if not email or not password:
         print("Usage: python scripts/create_super_admin.py --email YOUR_EMAIL --password YOUR_PASSWORD")
         print("   or: python scripts/create_super_admin.py <email> <password>")
+        print("   or: python scripts/create_super_admin.py <email>   (prompts for the password)")
+        sys.exit(1)
+
+    # Set up path/.env and import the DB layer only once the arguments are valid
+    from _bootstrap import ensure_on_path, load_env
+    ensure_on_path()
+    load_env()
+    from sqlalchemy.engine import make_url
+    from database.connection import DATABASE_URL, get_db_context
+
+    # Fail fast when PostgreSQL is down instead of waiting out the driver's connect retries
+    url = make_url(DATABASE_URL)
+    if not _database_reachable(url.host, url.port or 5432):
+        print("")
+        _print_connection_help()
         sys.exit(1)
 
-    from database.connection import get_db_context
     from services.super_admin_service import SuperAdminService
-    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.exc import DBAPIError
 
     try:
         with get_db_context() as db:
             admin = SuperAdminService.create_super_admin(email=email, password=password, db=db)
             print(f"Super admin created: {admin.email} (id={admin.id})")
-    except OperationalError as e:
-        err = str(e).lower()
-        if "connection refused" in err or "10061" in err:
-            print("")
-            print("PostgreSQL is not running or not reachable at localhost:5432.")
-            print("Start PostgreSQL first, then run this script again.")
-            print("  Windows: Open Services, start 'postgresql-x64-XX'; or run: net start postgresql-x64-16")
-            print("  Or start from Start Menu if you installed PostgreSQL with the stack builder.")
-            sys.exit(1)
-        if "password authentication failed" in err:
-            print("")
-            print("PostgreSQL rejected the username or password in your .env file.")
-            print("  - Check backend/.env: DATABASE_URL must match your real PostgreSQL user and password.")
-            print("  - User in the error is the one in the URL (e.g. snehanumerology).")
-            print("  - If the password has special characters (@ # % & etc), use URL encoding:")
-            print("    @ -> %40   # -> %23   % -> %25   & -> %26")
-            print("  - Or reset the DB user password in PostgreSQL to match what you put in .env.")
-            sys.exit(1)
-        if "not permitted to log in" in err:
-            print("")
-            print("The PostgreSQL role in your .env exists but is not allowed to log in.")
-            print("In psql as postgres, run (replace numerology_app if different):")
-            print("  ALTER ROLE numerology_app LOGIN;")
-            print("Then set a password if needed:")
-            print("  ALTER ROLE numerology_app WITH PASSWORD 'YourPassword';")
-            sys.exit(1)
-        if "permission denied" in err or "insufficient_privilege" in err:
-            print("")
-            print("The app user does not have permission on the database tables.")
-            print("Run grants as postgres: psql -U postgres -d numerology_msp -f backend/database/grants.sql")
-            print("(Replace numerology_app in grants.sql with your DATABASE_URL username if different.)")
-            sys.exit(1)
-        raise
+    except DBAPIError as e:
+        handler = _db_error_help(e)
+        if handler is None:
+            raise
+        print("")
+        handler()
+        sys.exit(1)
     except ValueError as e:
         print(f"Error: {e}")
         sys.exit(1)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Seed a dev database in one process: the localhost (or load-test) tenants,
+then optionally the first Super Admin.
+Run from backend:
+  python scripts/seed_all.py [--admin-email YOUR_EMAIL [--admin-password YOUR_PASSWORD]] [seed options]
+
+Seed options are passed through to seed_dev_tenant.py (e.g. --tenants 20).
+Running both steps in-process loads .env, imports SQLAlchemy and builds the
+engine and password hashers once, and later statements reuse its compiled cache.
+"""
+import argparse
+
+from _bootstrap import ensure_on_path, load_env
+
+ensure_on_path()
+load_env()
+
+import create_super_admin  # noqa: E402
+import seed_dev_tenant  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed tenants and the first Super Admin in one run.")
+    parser.add_argument("--admin-email", help="Also create this Super Admin")
+    parser.add_argument("--admin-password", help="Super Admin password (prompted for if omitted)")
+    args, seed_args = parser.parse_known_args()
+
+    seed_dev_tenant.main(seed_args)
+    if args.admin_email:
+        admin_args = [args.admin_email]
+        if args.admin_password:
+            admin_args.append(args.admin_password)
+        create_super_admin.main(admin_args)
+
+if __name__ == "__main__":
+    main()
@@ -7,84 +7,164 @@ Creates:
 - Tenant with custom_domain='localhost' (so http://localhost:3006 resolves to it)
 - One tenant admin user (email: tenantadmin@localhost.dev, password: Admin123!)
 - One regular user (email: user@localhost.dev, password: User123!)
+
+For load testing, bulk-seed tenants load1..loadN instead:
+  python scripts/seed_dev_tenant.py --tenants 20 --users-per-tenant 500
 """
-import os
+import argparse
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
-backend_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-if backend_root not in sys.path:
-    sys.path.insert(0, backend_root)
-os.chdir(backend_root)
+from _bootstrap import ensure_on_path, load_env
 
-from dotenv import load_dotenv
-load_dotenv()
+ensure_on_path()
+load_env()
 
-def main():
+def seed_localhost(out: list):
+    from sqlalchemy import func, literal_column
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
     from database.connection import get_db_context
-    from services.tenant_service import TenantService
-    from services.user_service import UserService
+    from database.models import Tenant, User
+    from utils.security import get_seed_pwd_context
+
+    # Hash both passwords in parallel before opening the session (the hashers release the GIL);
+    # seed data uses the cheap profile, real logins upgrade it
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        admin_hash, user_hash = pool.map(get_seed_pwd_context().hash, ["Admin123!", "User123!"])
+
+    users = [
+        dict(email="tenantadmin@localhost.dev", password_hash=admin_hash,
+             first_name="Tenant", last_name="Admin", is_admin=True),
+        dict(email="user@localhost.dev", password_hash=user_hash,
+             first_name="Demo", last_name="User", is_admin=False),
+    ]
 
+    # One INSERT per table and a single commit; ON CONFLICT keeps re-runs idempotent
     with get_db_context() as db:
-        # Create dev tenant for localhost
-        try:
-            tenant = TenantService.create_tenant(
-                subdomain=None,
+        # Get or create the dev tenant for localhost in one statement: the no-op update
+        # makes RETURNING yield the existing row too, and xmax = 0 only for a fresh insert
+        tenant_id, inserted = db.execute(
+            pg_insert(Tenant)
+            .values(
                 custom_domain="localhost",
                 company_name="Dev Tenant",
                 contact_email="dev@localhost.dev",
-                purchased_licenses=10,
-                db=db
+                purchased_user_licenses=10
             )
-            print(f"Tenant created: {tenant.company_name} (id={tenant.id})")
-        except ValueError as e:
-            if "already exists" in str(e).lower():
-                tenant = TenantService.get_tenant_by_custom_domain("localhost", db)
-                print(f"Tenant already exists: {tenant.company_name} (id={tenant.id})")
+            .on_conflict_do_update(
+                index_elements=[Tenant.custom_domain],
+                set_={"custom_domain": Tenant.custom_domain}
+            )
+            .returning(Tenant.id, literal_column("xmax = 0"))
+        ).one()
+        if inserted:
+            out.append(f"Tenant created: Dev Tenant (id={tenant_id})")
+        else:
+            out.append(f"Tenant already exists: Dev Tenant (id={tenant_id})")
+
+        # Create tenant admin and regular user (a fresh tenant has licenses to spare)
+        created = dict(db.execute(
+            pg_insert(User)
+            .values([dict(u, tenant_id=tenant_id) for u in users])
+            .on_conflict_do_nothing(index_elements=[User.tenant_id, func.lower(User.email)])
+            .returning(User.email, User.id)
+        ).all())
+
+        for u in users:
+            if u["email"] in created:
+                out.append(f"User created: {u['email']} (id={created[u['email']]})")
             else:
-                raise
+                out.append(f"User already exists: {u['email']}")
 
-        tenant_id = str(tenant.id)
+    out.append("")
+    out.append("You can now test on http://localhost:3006:")
+    out.append("  - Tenant Admin: /tenant-admin/login  -> tenantadmin@localhost.dev / Admin123!")
+    out.append("  - User:         /login               -> user@localhost.dev / User123!")
 
-        # Create tenant admin user
-        try:
-            admin = UserService.create_user(
-                tenant_id=tenant_id,
-                email="tenantadmin@localhost.dev",
-                password="Admin123!",
-                first_name="Tenant",
-                last_name="Admin",
-                is_admin=True,
-                db=db
+
+def seed_bulk(tenants: int, users_per_tenant: int, page_size: int, out: list):
+    """
+    Seed tenants load1..loadN (subdomains), each with users_per_tenant regular users
+    (email: user<j>@load<i>.dev, password: User123!), in one transaction.
+    Re-running skips rows that already exist.
+    """
+    from sqlalchemy import func
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    from database.connection import get_db_context
+    from database.models import Tenant, User
+    from utils.security import get_seed_pwd_context
+
+    # Every seeded user shares the password, so hash it once (cheap seed-only profile)
+    password_hash = get_seed_pwd_context().hash("User123!")
+    subdomains = [f"load{i}" for i in range(1, tenants + 1)]
+
+    with get_db_context() as db:
+        tenant_rows = [
+            dict(
+                subdomain=subdomain,
+                company_name=f"Load Tenant {subdomain}",
+                contact_email=f"admin@{subdomain}.dev",
+                purchased_user_licenses=users_per_tenant
             )
-            print(f"Tenant admin created: {admin.email} (id={admin.id})")
-        except ValueError as e:
-            if "already exists" in str(e).lower():
-                print("Tenant admin user already exists: tenantadmin@localhost.dev")
-            else:
-                raise
+            for subdomain in subdomains
+        ]
+        tenant_ids = []
+        for start in range(0, len(tenant_rows), page_size):
+            tenant_ids += db.execute(
+                pg_insert(Tenant)
+                .values(tenant_rows[start:start + page_size])
+                .on_conflict_do_update(
+                    index_elements=[Tenant.subdomain],
+                    set_={"subdomain": Tenant.subdomain}
+                )
+                .returning(Tenant.subdomain, Tenant.id)
+            ).all()
 
-        # Create regular user
-        try:
-            user = UserService.create_user(
+        user_rows = [
+            dict(
                 tenant_id=tenant_id,
-                email="user@localhost.dev",
-                password="User123!",
-                first_name="Demo",
-                last_name="User",
-                is_admin=False,
-                db=db
+                email=f"user{j}@{subdomain}.dev",
+                password_hash=password_hash,
+                first_name="Load",
+                last_name=f"User {j}",
+                is_admin=False
             )
-            print(f"User created: {user.email} (id={user.id})")
-        except ValueError as e:
-            if "already exists" in str(e).lower():
-                print("User already exists: user@localhost.dev")
-            else:
-                raise
+            for subdomain, tenant_id in tenant_ids
+            for j in range(1, users_per_tenant + 1)
+        ]
+        created = 0
+        for start in range(0, len(user_rows), page_size):
+            created += db.execute(
+                pg_insert(User)
+                .values(user_rows[start:start + page_size])
+                .on_conflict_do_nothing(index_elements=[User.tenant_id, func.lower(User.email)])
+            ).rowcount
+
+    out.append(f"Seeded {len(tenant_ids)} tenants; {created} users created, "
+               f"{len(user_rows) - created} already existed (password: User123!)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed dev/load-test tenants and users.")
+    parser.add_argument("--tenants", type=int, default=0,
+                        help="Bulk-seed this many load-test tenants instead of the localhost tenant")
+    parser.add_argument("--users-per-tenant", type=int, default=100, help="Users per load-test tenant")
+    parser.add_argument("--page-size", type=int, default=1000, help="Rows per INSERT statement")
+    args = parser.parse_args(argv)
+    if args.tenants < 0 or args.users_per_tenant < 0 or args.page_size < 1:
+        parser.error("--tenants and --users-per-tenant must be >= 0 and --page-size >= 1")
 
-    print("")
-    print("You can now test on http://localhost:3006:")
-    print("  - Tenant Admin: /tenant-admin/login  -> tenantadmin@localhost.dev / Admin123!")
-    print("  - User:         /login               -> user@localhost.dev / User123!")
+    # Status lines are collected and written in one go (also on failure, before the traceback)
+    out = []
+    try:
+        if args.tenants:
+            seed_bulk(args.tenants, args.users_per_tenant, args.page_size, out)
+        else:
+            seed_localhost(out)
+    finally:
+        if out:
+            sys.stdout.write("\n".join(out) + "\n")
+            sys.stdout.flush()
 
 if __name__ == "__main__":
     main()
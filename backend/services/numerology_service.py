@@ -3,7 +3,8 @@ Numerology service for calculating Root Number, Destiny Number, Natal Lo Shu Gri
 Mahadasha timeline, Antardasha, and Review Year Grid
 """
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -28,6 +29,9 @@ class NumerologyService:
         9: (0, 2),  # Top right
     }
     
+    # Same positions as a tuple indexed by number (slot 0 unused)
+    LO_SHU_SLOTS = (None, (0, 1), (2, 0), (0, 0), (2, 2), (1, 2), (1, 0), (1, 1), (2, 1), (0, 2))
+    
     # Weekday to Planet number mapping
     WEEKDAY_PLANET_MAP = {
         0: 1,  # Sunday
@@ -39,6 +43,9 @@ class NumerologyService:
         6: 8,  # Saturday
     }
     
+    # Same mapping indexed by Python's weekday() (0=Monday .. 6=Sunday), no rotation needed
+    PLANET_BY_PY_WEEKDAY = (2, 9, 5, 3, 6, 8, 1)
+    
     def __init__(self):
         # Pratyantar service will be initialized lazily to avoid circular imports
         self._pratyantar_service = None
@@ -56,7 +63,13 @@ class NumerologyService:
         Sum digits of a number.
         Example: digit_sum(1986) = 1+9+8+6 = 24
         """
-        return sum(int(digit) for digit in str(number))
+        if number < 0:
+            raise ValueError(f"digit_sum expects a non-negative integer, got {number}")
+        total = 0
+        while number:
+            number, digit = divmod(number, 10)
+            total += digit
+        return total
     
     def reduce_to_single(self, number: int) -> int:
         """
@@ -64,9 +77,10 @@ class NumerologyService:
         Example: reduce_to_single(24) = 2+4 = 6
         Example: reduce_to_single(30) = 3+0 = 3
         """
-        while number >= 10:
-            number = self.digit_sum(number)
-        return number
+        # Digital root identity: repeated digit sums of n >= 1 end at 1 + (n - 1) % 9
+        if number <= 0:
+            return number
+        return (number - 1) % 9 + 1
     
     def calculate_root_number(self, day: int) -> int:
         """
@@ -211,17 +225,14 @@ class NumerologyService:
         For each number 1..9, count occurrences and create string representation.
         Example: 6 occurs 3 times → "666", 3 occurs 1 time → "3"
         """
-        grid = {}
-        
-        # Count occurrences for each number 1-9
-        for num in range(1, 10):
-            count = digits.count(num)
-            if count > 0:
-                grid[num] = str(num) * count  # "6" * 3 = "666"
-            else:
-                grid[num] = None
+        # Count occurrences for each number 1-9 in one pass
+        counts = [0] * 10
+        for digit in digits:
+            if 1 <= digit <= 9:
+                counts[digit] += 1
         
-        return grid
+        # "6" * 3 = "666"; an empty string means the number is absent
+        return {num: str(num) * counts[num] or None for num in range(1, 10)}
     
     def get_natal_grid_array(self, grid: Dict[int, str]) -> List[List[Optional[str]]]:
         """
@@ -230,82 +241,70 @@ class NumerologyService:
         """
         result = [[None, None, None], [None, None, None], [None, None, None]]
         
-        for num, value in grid.items():
+        slots = self.LO_SHU_SLOTS
+        for num in range(1, 10):
+            value = grid.get(num)
             if value is not None:
-                row, col = self.LO_SHU_POSITIONS[num]
+                row, col = slots[num]
                 result[row][col] = value
         
         return result
     
+    def counts_to_grid_array(self, counts: List[int], extras: List[int]) -> List[List[Optional[str]]]:
+        """
+        Build the 3x3 Lo Shu array straight from per-number counts (indexed 0..9) plus
+        extra digits to add, without an intermediate grid dict.
+        Same result as build_natal_grid followed by get_natal_grid_array.
+        """
+        result = [[None, None, None], [None, None, None], [None, None, None]]
+        
+        slots = self.LO_SHU_SLOTS
+        for num in range(1, 10):
+            count = counts[num] + extras.count(num)
+            if count:
+                row, col = slots[num]
+                result[row][col] = str(num) * count
+        
+        return result
+    
     def generate_mahadasha_timeline(self, dob_date: datetime, root: int, years_ahead: int = 100) -> List[Dict[str, Any]]:
         """
         Generate Mahadasha timeline starting from root.
         Each dasha has a number 1-9, duration equals the number.
         Sequence wraps after 9.
+        Period start/end dates are datetime objects (serialize with isoformat() at the
+        API boundary). Timelines are memoized per (dob_date, root, years_ahead); the
+        period dicts are shared between calls, so treat them as read-only.
         """
-        timeline = []
-        current_date = dob_date
-        current_dasha = root
-        
-        end_date = datetime(dob_date.year + years_ahead, dob_date.month, dob_date.day)
-        
-        while current_date < end_date:
-            # Calculate end date: start + dasha years - 1 day
-            dasha_years = current_dasha
-            end_dasha_date = datetime(
-                current_date.year + dasha_years,
-                current_date.month,
-                current_date.day
-            ) - timedelta(days=1)
-            
-            # Don't exceed end_date
-            if end_dasha_date > end_date:
-                end_dasha_date = end_date
-            
-            timeline.append({
-                "dasha_number": current_dasha,
-                "start_date": current_date.isoformat(),
-                "end_date": end_dasha_date.isoformat(),
-                "duration_years": dasha_years
-            })
-            
-            # Move to next dasha
-            current_date = end_dasha_date + timedelta(days=1)
-            current_dasha = (current_dasha % 9) + 1  # Wrap after 9
-        
-        return timeline
+        return list(_mahadasha_timeline(dob_date, root, years_ahead))
     
     def get_mahadasha_for_date(self, timeline: List[Dict[str, Any]], query_date: datetime) -> Optional[int]:
         """
         Find current Mahadasha for a given date.
         Returns the dasha number active on that date.
         """
-        # Normalize query_date to date only (remove time component)
-        query_date_only = query_date.date()
-        
-        for period in timeline:
-            start_str = period["start_date"]
-            end_str = period["end_date"]
-            
-            # Parse dates (handle both datetime and date strings)
-            if 'T' in start_str:
-                start = datetime.fromisoformat(start_str).date()
+        # Periods are contiguous and sorted, so binary-search the last one starting on
+        # or before the query day (ordinals compare the date only, ignoring time)
+        query_ord = query_date.toordinal()
+        lo, hi = 0, len(timeline)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if timeline[mid]["_start_ord"] <= query_ord:
+                lo = mid + 1
             else:
-                start = datetime.fromisoformat(start_str + 'T00:00:00').date()
-            
-            if 'T' in end_str:
-                end = datetime.fromisoformat(end_str).date()
-            else:
-                end = datetime.fromisoformat(end_str + 'T00:00:00').date()
-            
-            if start <= query_date_only <= end:
-                logger.debug(f"Found Mahadasha {period['dasha_number']} for date {query_date_only} (period: {start} to {end})")
-                return period["dasha_number"]
+                hi = mid
+        
+        if lo and query_ord <= timeline[lo - 1]["_end_ord"]:
+            period = timeline[lo - 1]
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Found Mahadasha %s for date %s (period: %s to %s)",
+                             period["dasha_number"], query_date.date(), period["start_date"], period["end_date"])
+            return period["dasha_number"]
         
-        logger.warning(f"No Mahadasha found for date {query_date_only}. Timeline covers {len(timeline)} periods.")
+        logger.warning("No Mahadasha found for date %s. Timeline covers %s periods.", query_date.date(), len(timeline))
         if timeline:
-            logger.debug(f"First period: {timeline[0]['start_date']} to {timeline[0]['end_date']}")
-            logger.debug(f"Last period: {timeline[-1]['start_date']} to {timeline[-1]['end_date']}")
+            logger.debug("First period: %s to %s", timeline[0]["start_date"], timeline[0]["end_date"])
+            logger.debug("Last period: %s to %s", timeline[-1]["start_date"], timeline[-1]["end_date"])
         return None
     
     def weekday_to_planet(self, date: datetime) -> int:
@@ -316,14 +315,7 @@ class NumerologyService:
         Python weekday(): 0=Monday, 1=Tuesday, 2=Wednesday, 3=Thursday, 4=Friday, 5=Saturday, 6=Sunday
         Convert to: 0=Sunday, 1=Monday, 2=Tuesday, 3=Wednesday, 4=Thursday, 5=Friday, 6=Saturday
         """
-        weekday = date.weekday()  # 0=Monday, 6=Sunday in Python
-        # Convert to Sunday=0 format
-        if weekday == 6:  # Sunday
-            weekday = 0
-        else:  # Monday-Saturday: 0→1, 1→2, ..., 5→6
-            weekday = weekday + 1
-        
-        return self.WEEKDAY_PLANET_MAP[weekday]
+        return self.PLANET_BY_PY_WEEKDAY[date.weekday()]
     
     def calculate_antardasha(self, year: int, day: int, month: int, review_date: datetime, dob_root: Optional[int] = None) -> int:
         """
@@ -331,20 +323,12 @@ class NumerologyService:
         Formula: weekday_planet + yy + root (from DOB) + month
         Example for 2024: weekday_planet(2) + yy(24) + root(8 from DOB) + month(2) = 36 → 9
         """
-        yy = year % 100
-        weekday_planet = self.weekday_to_planet(review_date)
-        
         # Use root from DOB if provided, otherwise calculate from day
-        if dob_root is None:
-            root = self.reduce_to_single(day)
-        else:
-            root = dob_root
-        
-        # Month number (not reduced)
-        month_num = month
+        root = self.reduce_to_single(day) if dob_root is None else dob_root
         
-        total = weekday_planet + yy + root + month_num
-        return self.reduce_to_single(total)
+        # Month number (not reduced); weekday planet looked up straight from weekday()
+        total = self.PLANET_BY_PY_WEEKDAY[review_date.weekday()] + year % 100 + root + month
+        return (total - 1) % 9 + 1
     
     def generate_year_table(self, dob_date: datetime, root: int, month: int, day: int, 
                           start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[Dict[str, Any]]:
@@ -364,10 +348,17 @@ class NumerologyService:
         timeline = self.generate_mahadasha_timeline(dob_date, root, years_ahead=years_ahead)
         
         # Debug logging
-        logger.debug(f"Generated Mahadasha timeline: {len(timeline)} periods from {dob_date.year} to {dob_date.year + years_ahead}")
+        logger.debug("Generated Mahadasha timeline: %s periods from %s to %s",
+                     len(timeline), dob_date.year, dob_date.year + years_ahead)
         if timeline:
-            logger.debug(f"First period: Dasha {timeline[0]['dasha_number']} from {timeline[0]['start_date']} to {timeline[0]['end_date']}")
-            logger.debug(f"Last period: Dasha {timeline[-1]['dasha_number']} from {timeline[-1]['start_date']} to {timeline[-1]['end_date']}")
+            logger.debug("First period: Dasha %s from %s to %s",
+                         timeline[0]["dasha_number"], timeline[0]["start_date"], timeline[0]["end_date"])
+            logger.debug("Last period: Dasha %s from %s to %s",
+                         timeline[-1]["dasha_number"], timeline[-1]["start_date"], timeline[-1]["end_date"])
+        
+        # Antardasha = reduce(weekday_planet + yy + root + month); only the first two vary by year
+        antar_base = root + month
+        planet_by_weekday = self.PLANET_BY_PY_WEEKDAY
         
         year_table = []
         for year in range(start_year, end_year + 1):
@@ -379,7 +370,7 @@ class NumerologyService:
                 review_date = datetime(year, month, 28)
             
             maha = self.get_mahadasha_for_date(timeline, review_date)
-            antar = self.calculate_antardasha(year, day, month, review_date, dob_root=root)
+            antar = self.reduce_to_single(planet_by_weekday[review_date.weekday()] + year % 100 + antar_base)
             
             year_table.append({
                 "year": year,
@@ -480,51 +471,29 @@ class NumerologyService:
         # Generate mahadasha timeline for full range (120 years) to work for any review year
         timeline = self.generate_mahadasha_timeline(dob_date, root, years_ahead=120)
         
-        # Get Mahadasha for the year (using the birthday of target year)
+        # Mahadasha and Antardasha for the year (both keyed on the birthday of target year)
         try:
             year_birthday = datetime(target_year, month, day)
         except ValueError:
             year_birthday = datetime(target_year, month, 28)
         
         maha = self.get_mahadasha_for_date(timeline, year_birthday)
+        antar = self.calculate_antardasha(target_year, day, month, year_birthday, dob_root=root)
         
-        # Calculate Antardasha for the target year
-        try:
-            year_birthday_for_antar = datetime(target_year, month, day)
-        except ValueError:
-            year_birthday_for_antar = datetime(target_year, month, 28)
-        
-        antar = self.calculate_antardasha(target_year, day, month, year_birthday_for_antar, dob_root=root)
-        
-        # Build annual grid: Natal + Mahadasha + Antardasha (same as in calculate_numerology)
-        # Start with natal grid dict (convert to counts for period grid building)
-        annual_grid_dict = {}
-        for num in range(1, 10):
-            natal_value = natal_grid_dict.get(num)
-            annual_grid_dict[num] = natal_value if natal_value else ""
-        
-        # Add Mahadasha (always added)
+        # Annual grid counts: Natal + Mahadasha + Antardasha (same layers as in calculate_numerology),
+        # counted directly instead of building the digit strings first
+        annual_grid_counts = {num: len(natal_grid_dict.get(num) or "") for num in range(1, 10)}
         if maha is not None and 1 <= maha <= 9:
-            current_value = annual_grid_dict.get(maha) or ""
-            annual_grid_dict[maha] = current_value + str(maha)
-        
-        # Add Antardasha (always added)
+            annual_grid_counts[maha] += 1
         if antar is not None and 1 <= antar <= 9:
-            current_value = annual_grid_dict.get(antar) or ""
-            annual_grid_dict[antar] = current_value + str(antar)
-        
-        # Convert annual grid dict to counts format for period grid building
-        annual_grid_counts = {}
-        for num in range(1, 10):
-            value = annual_grid_dict.get(num) or ""
-            if value:
-                annual_grid_counts[num] = len(value)  # Count of digits
-            else:
-                annual_grid_counts[num] = 0
+            annual_grid_counts[antar] += 1
         
         # Debug logging
-        logger.debug(f"Annual grid dict for year {target_year}: {annual_grid_dict}")
-        logger.debug(f"Annual grid counts for year {target_year} (Natal + Mahadasha {maha} + Antardasha {antar}): {annual_grid_counts}")
+        logger.debug("Annual grid counts for year %s (Natal + Mahadasha %s + Antardasha %s): %s",
+                     target_year, maha, antar, annual_grid_counts)
+        
+        # Personal Year is fixed for the target year (for display/interpretation only, NOT added to grid)
+        personal_year = self.calculate_personal_year(month, day, target_year)
         
         # Generate pratyantar periods using the service (pass dob_root for antardasha calculation)
         periods = self.pratyantar_service.generate_pratyantar_periods(
@@ -541,8 +510,7 @@ class NumerologyService:
             # Get Mahadasha for THIS PERIOD (from timeline, using period start date) - for display only
             period_maha = self.get_mahadasha_for_date(timeline, period_start_date)
             
-            # Calculate Personal Year and Personal Month for this period (for display/interpretation only, NOT added to grid)
-            personal_year = self.calculate_personal_year(month, day, target_year)
+            # Personal Month for this period (for display/interpretation only, NOT added to grid)
             calendar_month = period_start_date.month
             personal_month = self.calculate_personal_month(personal_year, calendar_month)
             
@@ -614,6 +582,9 @@ class NumerologyService:
             
             # Generate grids for all years in the range
             # Each grid represents a year period from birthdate anniversary to next anniversary
+            # Natal occurrences per number; each year's grid is these plus Maha and Antar
+            natal_counts = [0] + [len(natal_grid_dict[num] or "") for num in range(1, 10)]
+            
             year_grids = []
             for year_entry in year_table:
                 year_num = year_entry["year"]
@@ -637,51 +608,27 @@ class NumerologyService:
                 
                 # Build annual grid: Natal + Mahadasha + Antardasha only
                 # Personal Year and Basic Numbers are NOT added to annual grid (only for period grids)
-                
-                # Start with natal grid (copy)
-                annual_grid_dict = {}
-                for num in range(1, 10):
-                    natal_value = natal_grid_dict.get(num)
-                    annual_grid_dict[num] = natal_value if natal_value else ""
-                
-                # Debug logging
-                logger.debug(f"Year {year_num}: Natal grid dict = {natal_grid_dict}")
-                logger.debug(f"Year {year_num}: Mahadasha from year_table = {maha}, Antardasha = {antar}")
+                logger.debug("Year %s: Mahadasha from year_table = %s, Antardasha = %s", year_num, maha, antar)
                 
                 # If maha is None from year_table, try to get it directly from timeline
                 if maha is None:
-                    logger.warning(f"Year {year_num}: Mahadasha is None from year_table, trying timeline lookup...")
-                    try:
-                        review_date = datetime(year_num, month, day)
-                    except ValueError:
-                        review_date = datetime(year_num, month, 28)
-                    maha = self.get_mahadasha_for_date(mahadasha_timeline, review_date)
-                    logger.debug(f"Year {year_num}: Mahadasha from timeline lookup = {maha}")
+                    logger.warning("Year %s: Mahadasha is None from year_table, trying timeline lookup...", year_num)
+                    # The review date is the period start (birthday in year_num)
+                    maha = self.get_mahadasha_for_date(mahadasha_timeline, period_start)
+                    logger.debug("Year %s: Mahadasha from timeline lookup = %s", year_num, maha)
                 
-                # Add Mahadasha (always added)
+                # Mahadasha and Antardasha are always added on top of the natal counts
+                extras = []
                 if maha is not None and 1 <= maha <= 9:
-                    current_value = annual_grid_dict.get(maha) or ""
-                    annual_grid_dict[maha] = current_value + str(maha)
-                    logger.debug(f"Year {year_num}: Added Mahadasha {maha}, position {maha} now = '{annual_grid_dict[maha]}'")
+                    extras.append(maha)
                 else:
-                    logger.error(f"Year {year_num}: Cannot add Mahadasha - value is None or invalid: {maha}")
-                
-                # Add Antardasha (always added)
+                    logger.error("Year %s: Cannot add Mahadasha - value is None or invalid: %s", year_num, maha)
                 if antar is not None and 1 <= antar <= 9:
-                    current_value = annual_grid_dict.get(antar) or ""
-                    annual_grid_dict[antar] = current_value + str(antar)
-                    logger.debug(f"Year {year_num}: Added Antardasha {antar}, position {antar} now = '{annual_grid_dict[antar]}'")
+                    extras.append(antar)
                 else:
-                    logger.warning(f"Year {year_num}: Cannot add Antardasha - value is None or invalid: {antar}")
+                    logger.warning("Year %s: Cannot add Antardasha - value is None or invalid: %s", year_num, antar)
                 
-                # Convert to final format (None for empty cells)
-                for num in range(1, 10):
-                    value = annual_grid_dict.get(num) or ""
-                    annual_grid_dict[num] = value if value else None
-                
-                logger.debug(f"Year {year_num}: Final annual grid dict = {annual_grid_dict}")
-                
-                year_grid_array = self.get_natal_grid_array(annual_grid_dict)
+                year_grid_array = self.counts_to_grid_array(natal_counts, extras)
                 
                 year_grids.append({
                     "year": year_num,
@@ -710,3 +657,53 @@ class NumerologyService:
         except Exception as e:
             logger.error(f"Error calculating numerology: {e}", exc_info=True)
             raise
+
+
+ONE_DAY = timedelta(days=1)
+
+
+def _add_years(date: datetime, years: int) -> datetime:
+    """Same month/day `years` later; Feb 29 falls back to Feb 28 (as the year table does)"""
+    try:
+        return date.replace(year=date.year + years)
+    except ValueError:
+        return date.replace(year=date.year + years, day=28)
+
+
+@lru_cache(maxsize=128)
+def _mahadasha_timeline(dob_date: datetime, root: int, years_ahead: int) -> Tuple[Dict[str, Any], ...]:
+    """
+    Build the Mahadasha periods for NumerologyService.generate_mahadasha_timeline.
+    One request builds the same timeline for the calculation, the year table and the
+    monthly grids, so it is cached at module level (keyed on plain values, not the service).
+    """
+    timeline = []
+    current_date = dob_date
+    current_dasha = root
+    
+    end_date = _add_years(dob_date, years_ahead)
+    
+    while current_date < end_date:
+        # Calculate end date: start + dasha years - 1 day
+        dasha_years = current_dasha
+        end_dasha_date = _add_years(current_date, dasha_years) - ONE_DAY
+        
+        # Don't exceed end_date
+        if end_dasha_date > end_date:
+            end_dasha_date = end_date
+        
+        timeline.append({
+            "dasha_number": current_dasha,
+            "start_date": current_date,
+            "end_date": end_dasha_date,
+            "duration_years": dasha_years,
+            # Day ordinals for get_mahadasha_for_date's binary search
+            "_start_ord": current_date.toordinal(),
+            "_end_ord": end_dasha_date.toordinal()
+        })
+        
+        # Move to next dasha
+        current_date = end_dasha_date + ONE_DAY
+        current_dasha = (current_dasha % 9) + 1  # Wrap after 9
+    
+    return tuple(timeline)
@@ -98,7 +98,8 @@ class PratyantarService:
             counts[pratyantar] = counts.get(pratyantar, 0) + 1  # Exactly +1 for Pratyantar
         
         # Debug logging
-        logger.debug(f"Building period grid: pratyantar={pratyantar}, annual_grid_counts={annual_grid_counts}, final_counts={counts}")
+        logger.debug("Building period grid: pratyantar=%s, annual_grid_counts=%s, final_counts=%s",
+                     pratyantar, annual_grid_counts, counts)
         
         grid = {}
         for num in range(1, 10):
@@ -132,7 +133,7 @@ class PratyantarService:
         )
         
         # Debug logging
-        logger.debug(f"Year {year} antardasha: {year_antardasha}")
+        logger.debug("Year %s antardasha: %s", year, year_antardasha)
         
         periods = []
         pratyantar_multi = year_antardasha  # Start from year's antardasha
@@ -156,7 +157,8 @@ class PratyantarService:
             
             # If remaining days are less than a full period duration, skip adding this partial period
             if remaining_days < full_period_duration:
-                logger.debug(f"Skipping partial period P{period_idx}: only {remaining_days} days remaining, need {full_period_duration} days for full period")
+                logger.debug("Skipping partial period P%s: only %s days remaining, need %s days for full period",
+                             period_idx, remaining_days, full_period_duration)
                 break
             
             # Calculate period end date
@@ -168,7 +170,8 @@ class PratyantarService:
                 duration_days = (current_end - current_start).days + 1
                 # If this period is still too short, don't add it
                 if duration_days < full_period_duration:
-                    logger.debug(f"Skipping partial period P{period_idx}: duration {duration_days} days < required {full_period_duration} days")
+                    logger.debug("Skipping partial period P%s: duration %s days < required %s days",
+                                 period_idx, duration_days, full_period_duration)
                     break
             else:
                 duration_days = full_period_duration
@@ -184,7 +187,8 @@ class PratyantarService:
             })
             
             # Debug logging
-            logger.debug(f"P{period_idx} multi={pratyantar_multi} start={current_start.strftime('%d/%m/%Y')} end={current_end.strftime('%d/%m/%Y')} duration={duration_days}")
+            logger.debug("P%s multi=%s start=%s end=%s duration=%s", period_idx, pratyantar_multi,
+                         periods[-1]['start'], periods[-1]['end'], duration_days)
             
             # Next start = end +1
             current_start = current_end + timedelta(days=1)
@@ -3,16 +3,44 @@ Super Admin Service - Business logic for super admin management
 """
 from sqlalchemy.orm import Session
 from typing import Optional, List, Dict
+from dataclasses import dataclass
+from datetime import datetime
 from database.models import SuperAdmin, Tenant, User, UserSession
 from database.connection import get_db_context
-from passlib.context import CryptContext
-from sqlalchemy import func
+from utils.security import get_pwd_context
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@dataclass(frozen=True)
+class SuperAdminSnapshot:
+    """
+    Read-only copy of a super admin row, safe to cache across requests
+    (ORM objects are bound to the session that loaded them).
+    """
+    id: uuid.UUID
+    email: str
+    first_name: Optional[str]
+    last_name: Optional[str]
+    is_active: bool
+    last_login: Optional[datetime]
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_admin(cls, admin: SuperAdmin) -> "SuperAdminSnapshot":
+        return cls(
+            id=admin.id,
+            email=admin.email,
+            first_name=admin.first_name,
+            last_name=admin.last_name,
+            is_active=admin.is_active,
+            last_login=admin.last_login,
+            created_at=admin.created_at,
+        )
 
 
 class SuperAdminService:
@@ -21,12 +49,17 @@ class SuperAdminService:
     @staticmethod
     def hash_password(password: str) -> str:
         """Hash a password"""
-        return pwd_context.hash(password)
+        return get_pwd_context().hash(password)
 
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
         """Verify a password"""
-        return pwd_context.verify(plain_password, hashed_password)
+        return get_pwd_context().verify(plain_password, hashed_password)
+
+    @staticmethod
+    def password_needs_rehash(hashed_password: str) -> bool:
+        """Check whether a stored hash uses a deprecated scheme or outdated cost settings"""
+        return get_pwd_context().needs_update(hashed_password)
 
     @staticmethod
     def get_super_admin_by_email(email: str, db: Session) -> Optional[SuperAdmin]:
@@ -60,33 +93,38 @@ class SuperAdminService:
         first_name: Optional[str] = None,
         last_name: Optional[str] = None,
         db: Session = None
-    ) -> SuperAdmin:
-        """Create a new super admin"""
+    ) -> SuperAdminSnapshot:
+        """Create a new super admin; returns a snapshot of the inserted row"""
         if db is None:
             with get_db_context() as db:
                 return SuperAdminService.create_super_admin(
                     email, password, first_name, last_name, db
                 )
 
-        # Check if admin already exists
-        existing = SuperAdminService.get_super_admin_by_email(email, db)
-        if existing:
-            raise ValueError(f"Super admin with email {email} already exists")
-
         # Hash password
         password_hash = SuperAdminService.hash_password(password)
 
-        # Create admin
-        admin = SuperAdmin(
-            email=email,
-            password_hash=password_hash,
-            first_name=first_name,
-            last_name=last_name
-        )
-
-        db.add(admin)
+        # Create admin; an existing email makes the insert a no-op instead of being
+        # checked with a separate query first. Plain RETURNING columns skip the
+        # identity map, so nothing has to be detached or reloaded after commit
+        row = db.execute(
+            pg_insert(SuperAdmin)
+            .values(
+                email=email,
+                password_hash=password_hash,
+                first_name=first_name,
+                last_name=last_name
+            )
+            .on_conflict_do_nothing(index_elements=[SuperAdmin.email])
+            .returning(
+                SuperAdmin.id, SuperAdmin.email, SuperAdmin.first_name, SuperAdmin.last_name,
+                SuperAdmin.is_active, SuperAdmin.last_login, SuperAdmin.created_at
+            )
+        ).one_or_none()
+        if row is None:
+            raise ValueError(f"Super admin with email {email} already exists")
+        admin = SuperAdminSnapshot(**row._mapping)
         db.commit()
-        db.refresh(admin)
 
         logger.info(f"Created super admin: {admin.id} ({email})")
         return admin
@@ -156,7 +194,7 @@ class SuperAdminService:
 
         query = db.query(Tenant)
 
-        # Apply filters
+        # Apply filters (search is backed by pg_trgm GIN indexes, see schema.sql)
         if search:
             search_term = f"%{search}%"
             query = query.filter(
@@ -169,11 +207,20 @@ class SuperAdminService:
         if is_active is not None:
             query = query.filter(Tenant.is_active == is_active)
 
-        # Get total count
-        total = query.count()
-
-        # Apply pagination
-        tenants = query.order_by(Tenant.created_at.desc()).offset(skip).limit(limit).all()
+        # Page and total in one round trip: COUNT(*) OVER () is evaluated before LIMIT
+        rows = (
+            query.add_columns(func.count().over().label("total"))
+            .order_by(Tenant.created_at.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+        tenants = [row[0] for row in rows]
+        if rows:
+            total = rows[0].total
+        else:
+            # Past the last page the window has no rows to report on
+            total = query.count() if skip else 0
 
         return {
             "tenants": tenants,
@@ -193,13 +240,19 @@ class SuperAdminService:
             with get_db_context() as db:
                 return SuperAdminService.update_tenant_licenses(tenant_id, licenses_count, db)
 
-        tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
+        # Single UPDATE ... RETURNING instead of SELECT + UPDATE + refresh SELECT
+        tenant = db.execute(
+            update(Tenant)
+            .where(Tenant.id == tenant_id)
+            .values(purchased_user_licenses=licenses_count)
+            .returning(Tenant)
+        ).scalar_one_or_none()
         if not tenant:
             raise ValueError(f"Tenant {tenant_id} not found")
 
-        tenant.purchased_user_licenses = licenses_count
+        # Detach so the returned values stay readable after commit without a reload
+        db.expunge(tenant)
         db.commit()
-        db.refresh(tenant)
 
         logger.info(f"Updated tenant {tenant_id} licenses to {licenses_count}")
         return tenant
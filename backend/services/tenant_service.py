@@ -2,14 +2,57 @@
 Tenant Service - Business logic for tenant management
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import Optional, List
+from sqlalchemy import func, select
+from typing import Optional, List, Tuple
+from dataclasses import dataclass
+from cachetools import TTLCache
 from database.models import Tenant, User
 from database.connection import get_db_context
+import threading
+import uuid
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Host -> resolved tenant, consulted by TenantMiddleware on every request
+HOST_TENANT_CACHE_TTL_SECONDS = 60
+_host_tenant_cache = TTLCache(maxsize=2048, ttl=HOST_TENANT_CACHE_TTL_SECONDS)
+_tenant_cache_lock = threading.Lock()
+
+# Hosts that resolved to no tenant (stray DNS, scanners). Kept briefly, and cleared
+# whenever a tenant is created so a new subdomain/custom domain works immediately
+HOST_MISS_CACHE_TTL_SECONDS = 15
+_host_miss_cache = TTLCache(maxsize=1024, ttl=HOST_MISS_CACHE_TTL_SECONDS)
+
+
+@dataclass(frozen=True)
+class TenantSnapshot:
+    """
+    Read-only copy of the tenant fields used on request hot paths.
+    Cached instead of ORM objects, which are bound to the session that loaded them.
+    """
+    id: uuid.UUID
+    subdomain: Optional[str]
+    custom_domain: Optional[str]
+    company_name: str
+    logo_url: Optional[str]
+    primary_color: Optional[str]
+    secondary_color: Optional[str]
+    is_active: bool
+
+    @classmethod
+    def from_tenant(cls, tenant: Tenant) -> "TenantSnapshot":
+        return cls(
+            id=tenant.id,
+            subdomain=tenant.subdomain,
+            custom_domain=tenant.custom_domain,
+            company_name=tenant.company_name,
+            logo_url=tenant.logo_url,
+            primary_color=tenant.primary_color,
+            secondary_color=tenant.secondary_color,
+            is_active=tenant.is_active,
+        )
+
 
 class TenantService:
     """Service for tenant-related operations"""
@@ -43,26 +86,69 @@ class TenantService:
         """Get tenant by ID"""
         return db.query(Tenant).filter(Tenant.id == tenant_id).first()
 
+    @staticmethod
+    def invalidate_tenant_cache(tenant_id: str) -> None:
+        """Drop a tenant's cached host snapshots after it has been modified"""
+        key = str(tenant_id)
+        with _tenant_cache_lock:
+            # A reactivated tenant's hosts may be remembered as unresolved
+            _host_miss_cache.clear()
+            stale_hosts = [host for host, snapshot in _host_tenant_cache.items() if str(snapshot.id) == key]
+            for host in stale_hosts:
+                _host_tenant_cache.pop(host, None)
+
+    @staticmethod
+    def get_cached_host_tenant(host: str) -> Optional[TenantSnapshot]:
+        """Get the tenant snapshot previously resolved for a host, if still cached"""
+        with _tenant_cache_lock:
+            return _host_tenant_cache.get(host)
+
+    @staticmethod
+    def cache_host_tenant(host: str, tenant) -> TenantSnapshot:
+        """Remember the tenant (ORM row or snapshot) resolved for a host and return its snapshot"""
+        snapshot = tenant if isinstance(tenant, TenantSnapshot) else TenantSnapshot.from_tenant(tenant)
+        with _tenant_cache_lock:
+            _host_tenant_cache[host] = snapshot
+        return snapshot
+
     @staticmethod
     def get_license_usage(tenant_id: str, db: Session) -> dict:
         """Get license usage for a tenant"""
-        tenant = TenantService.get_tenant_by_id(tenant_id, db)
-        if not tenant:
-            return {
-                "purchased_licenses": 0,
-                "used_licenses": 0,
-                "available_licenses": 0,
-                "usage_percentage": 0
-            }
+        result = TenantService.get_tenant_with_license_usage(tenant_id, db)
+        if not result:
+            return TenantService._license_usage(0, 0)
+        return result[1]
 
+    @staticmethod
+    def get_tenant_with_license_usage(tenant_id: str, db: Session) -> Optional[Tuple[Tenant, dict]]:
+        """
+        Get a tenant together with its license usage in a single query.
+        
+        Returns:
+            (tenant, license_usage) or None if the tenant does not exist
+        """
         # Count active users that consume a license (exclude tenant admins)
-        used_licenses = db.query(func.count(User.id)).filter(
-            User.tenant_id == tenant_id,
-            User.is_active == True,
-            User.is_admin == False
-        ).scalar() or 0
+        used_licenses = (
+            select(func.count(User.id))
+            .where(
+                User.tenant_id == Tenant.id,
+                User.is_active == True,
+                User.is_admin == False
+            )
+            .correlate(Tenant)
+            .scalar_subquery()
+        )
+        row = db.execute(
+            select(Tenant, used_licenses).where(Tenant.id == tenant_id)
+        ).first()
+        if not row:
+            return None
 
-        purchased_licenses = tenant.purchased_user_licenses
+        tenant, used = row
+        return tenant, TenantService._license_usage(tenant.purchased_user_licenses, used or 0)
+
+    @staticmethod
+    def _license_usage(purchased_licenses: int, used_licenses: int) -> dict:
         available_licenses = max(0, purchased_licenses - used_licenses)
         usage_percentage = (used_licenses / purchased_licenses * 100) if purchased_licenses > 0 else 0
 
@@ -79,6 +165,24 @@ class TenantService:
         usage = TenantService.get_license_usage(tenant_id, db)
         return usage["available_licenses"] > 0
 
+    @staticmethod
+    def is_host_miss_cached(host: str) -> bool:
+        """Whether a host recently failed to resolve to any tenant"""
+        with _tenant_cache_lock:
+            return host in _host_miss_cache
+
+    @staticmethod
+    def cache_host_miss(host: str) -> None:
+        """Remember that a host resolved to no tenant"""
+        with _tenant_cache_lock:
+            _host_miss_cache[host] = True
+
+    @staticmethod
+    def clear_host_misses() -> None:
+        """Forget unresolved hosts (call once a new tenant is committed)"""
+        with _tenant_cache_lock:
+            _host_miss_cache.clear()
+
     @staticmethod
     def create_tenant(
         subdomain: Optional[str],
@@ -87,14 +191,20 @@ class TenantService:
         contact_email: str,
         contact_phone: Optional[str] = None,
         purchased_licenses: int = 10,
-        db: Session = None
+        db: Session = None,
+        commit: bool = True
     ) -> Tenant:
-        """Create a new tenant"""
+        """
+        Create a new tenant.
+        With commit=False the tenant is only flushed (id assigned) so the caller can
+        add related rows and commit everything as one transaction; the caller must
+        then call clear_host_misses() after committing.
+        """
         if db is None:
             with get_db_context() as db:
                 return TenantService.create_tenant(
                     subdomain, custom_domain, company_name, contact_email,
-                    contact_phone, purchased_licenses, db
+                    contact_phone, purchased_licenses, db, commit
                 )
 
         # Validate that at least one domain is provided
@@ -122,10 +232,14 @@ class TenantService:
         )
 
         db.add(tenant)
-        db.commit()
-        db.refresh(tenant)
+        if commit:
+            db.commit()
+            db.refresh(tenant)
+            TenantService.clear_host_misses()
+        else:
+            db.flush()
 
-        logger.info(f"Created tenant: {tenant.id} ({company_name})")
+        logger.info("Created tenant: %s (%s)", tenant.id, company_name)
         return tenant
 
     @staticmethod
@@ -162,8 +276,9 @@ class TenantService:
 
         db.commit()
         db.refresh(tenant)
+        TenantService.invalidate_tenant_cache(tenant_id)
 
-        logger.info(f"Updated branding for tenant: {tenant_id}")
+        logger.info("Updated branding for tenant: %s", tenant_id)
         return tenant
 
     @staticmethod
@@ -181,5 +296,5 @@ class TenantService:
         db.commit()
         db.refresh(tenant)
 
-        logger.info(f"Added {licenses_count} licenses to tenant {tenant_id}")
+        logger.info("Added %s licenses to tenant %s", licenses_count, tenant_id)
         return tenant
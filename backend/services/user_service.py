@@ -2,18 +2,100 @@
 User Service - Business logic for user management
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import Optional, List, Dict
-from database.models import User, Tenant
+from sqlalchemy import Text, case, cast, func, lambda_stmt, literal_column, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert as pg_insert
+from typing import Optional, List, Dict, Tuple
+from dataclasses import dataclass
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import uuid
+from database.models import User, Tenant, PasswordResetToken
 from database.connection import get_db_context
 from services.tenant_service import TenantService
-from passlib.context import CryptContext
+from utils.security import get_pwd_context
+from utils.token_cache import user_token_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Shared pool for bulk password hashing, capped so concurrent batches can't run dozens
+# of memory-hungry argon2 hashes at once
+HASH_MAX_WORKERS = 4
+_HASH_EXECUTOR = ThreadPoolExecutor(max_workers=HASH_MAX_WORKERS, thread_name_prefix="password-hash")
+
+
+def _iso_timestamp(column):
+    """
+    Render a timestamp the way datetime.isoformat() (and so pydantic) does: six
+    fractional digits, omitted entirely when the microseconds are zero. Postgres'
+    own JSON rendering trims trailing zeros instead (…:00.12).
+    """
+    # NULL stays NULL: to_char(NULL) || ... is NULL, which json_build_object renders as null
+    return func.to_char(column, literal_column("'YYYY-MM-DD\"T\"HH24:MI:SS'")).op("||")(
+        case(
+            (func.date_trunc("second", column) == column, literal_column("''")),
+            else_=func.to_char(column, literal_column("'.US'"))
+        )
+    )
+
+
+# Columns served by the user list endpoints (never password_hash)
+USER_LIST_COLUMNS = (
+    User.id, User.email, User.first_name, User.last_name, User.is_admin,
+    User.is_active, User.last_login, User.created_at,
+)
+
+
+def encode_user_cursor(created_at: datetime, user_id: uuid.UUID) -> str:
+    """Opaque user-list cursor pointing just past (created_at, id)"""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{user_id}".encode()).decode()
+
+
+def decode_user_cursor(cursor: str) -> tuple:
+    """
+    Inverse of encode_user_cursor.
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        created_at, user_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(user_id)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """
+    Read-only copy of an authenticated user, safe to cache across requests
+    (ORM objects are bound to the session that loaded them).
+    """
+    id: uuid.UUID
+    tenant_id: uuid.UUID
+    email: str
+    first_name: Optional[str]
+    last_name: Optional[str]
+    is_admin: bool
+    is_active: bool
+    last_login: Optional[datetime]
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            tenant_id=user.tenant_id,
+            email=user.email,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            is_admin=user.is_admin,
+            is_active=user.is_active,
+            last_login=user.last_login,
+            created_at=user.created_at,
+        )
 
 
 class UserService:
@@ -22,12 +104,17 @@ class UserService:
     @staticmethod
     def hash_password(password: str) -> str:
         """Hash a password"""
-        return pwd_context.hash(password)
+        return get_pwd_context().hash(password)
 
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
         """Verify a password"""
-        return pwd_context.verify(plain_password, hashed_password)
+        return get_pwd_context().verify(plain_password, hashed_password)
+
+    @staticmethod
+    def password_needs_rehash(hashed_password: str) -> bool:
+        """Check whether a stored hash uses a deprecated scheme or outdated cost settings"""
+        return get_pwd_context().needs_update(hashed_password)
 
     @staticmethod
     def get_user_by_email(email: str, tenant_id: str, db: Session) -> Optional[User]:
@@ -40,51 +127,103 @@ class UserService:
     @staticmethod
     def get_user_by_id(user_id: str, tenant_id: str, db: Session) -> Optional[User]:
         """Get user by ID within a tenant"""
-        return db.query(User).filter(
-            User.id == user_id,
-            User.tenant_id == tenant_id
-        ).first()
+        # lambda_stmt: the statement is built once and reused from the cache;
+        # user_id/tenant_id become bound parameters
+        return db.scalars(lambda_stmt(
+            lambda: select(User).where(User.id == user_id, User.tenant_id == tenant_id)
+        )).first()
 
     @staticmethod
-    def list_users(
+    def _list_users_criteria(
         tenant_id: str,
-        skip: int = 0,
-        limit: int = 100,
-        search: Optional[str] = None,
-        is_active: Optional[bool] = None,
-        db: Session = None
-    ) -> Dict:
-        """List users for a tenant with pagination and search"""
-        if db is None:
-            with get_db_context() as db:
-                return UserService.list_users(tenant_id, skip, limit, search, is_active, db)
-
-        query = db.query(User).filter(User.tenant_id == tenant_id)
+        cursor: Optional[str],
+        search: Optional[str],
+        is_active: Optional[bool]
+    ) -> list:
+        """WHERE criteria for list_users_json"""
+        criteria = [User.tenant_id == tenant_id]
 
         # Apply filters
         if search:
             search_term = f"%{search}%"
-            query = query.filter(
+            criteria.append(
                 (User.email.ilike(search_term)) |
                 (User.first_name.ilike(search_term)) |
                 (User.last_name.ilike(search_term))
             )
 
         if is_active is not None:
-            query = query.filter(User.is_active == is_active)
+            criteria.append(User.is_active == is_active)
 
-        # Get total count
-        total = query.count()
+        # Seek past the last row of the previous page instead of OFFSET, so every
+        # page is an index range scan on (tenant_id, created_at, id)
+        if cursor:
+            criteria.append(tuple_(User.created_at, User.id) < decode_user_cursor(cursor))
 
-        # Apply pagination
-        users = query.order_by(User.created_at.desc()).offset(skip).limit(limit).all()
+        return criteria
 
-        return {
-            "users": users,
-            "total": total,
-            "skip": skip,
-            "limit": limit
-        }
+    @staticmethod
+    def list_users_json(
+        tenant_id: str,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        search: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        db: Session = None
+    ) -> Tuple[str, Optional[str]]:
+        """
+        List users for a tenant, newest first, with keyset pagination and search.
+        Pass the returned next_cursor to fetch the following page (None on the last page).
+        The users are rendered as a JSON array by Postgres (json_agg) from the listed
+        columns only (no password_hash), so no ORM objects or response models are built.
+        
+        Returns:
+            (users JSON array text, next_cursor)
+        
+        Raises:
+            ValueError: If cursor is malformed
+        """
+        if db is None:
+            with get_db_context() as db:
+                return UserService.list_users_json(tenant_id, cursor, limit, search, is_active, db)
+
+        order = (User.created_at.desc(), User.id.desc())
+        page = (
+            select(*USER_LIST_COLUMNS, func.row_number().over(order_by=order).label("rn"))
+            .where(*UserService._list_users_criteria(tenant_id, cursor, search, is_active))
+            .order_by(*order)
+            .limit(limit + 1)  # one extra row tells us whether another page exists
+            .subquery()
+        )
+        user_json = func.json_build_object(
+            "id", page.c.id,
+            "email", page.c.email,
+            "first_name", page.c.first_name,
+            "last_name", page.c.last_name,
+            "is_admin", page.c.is_admin,
+            "is_active", page.c.is_active,
+            "last_login", _iso_timestamp(page.c.last_login),
+            "created_at", _iso_timestamp(page.c.created_at),
+        )
+        in_page = page.c.rn <= limit
+        last_row = page.c.rn == limit
+        users_json, row_count, last_created_at, last_id = db.execute(
+            select(
+                # Text, not json: the driver would otherwise parse it back into Python objects
+                cast(func.coalesce(
+                    func.json_agg(aggregate_order_by(user_json, page.c.rn)).filter(in_page),
+                    literal_column("'[]'::json")
+                ), Text),
+                func.count(),
+                func.max(page.c.created_at).filter(last_row),
+                func.max(cast(page.c.id, Text)).filter(last_row),
+            )
+        ).one()
+
+        next_cursor = None
+        if row_count > limit:
+            next_cursor = encode_user_cursor(last_created_at, last_id)
+        return users_json, next_cursor
 
     @staticmethod
     def create_user(
@@ -94,44 +233,130 @@ class UserService:
         first_name: Optional[str] = None,
         last_name: Optional[str] = None,
         is_admin: bool = False,
-        db: Session = None
+        db: Session = None,
+        commit: bool = True,
+        password_hash: Optional[str] = None,
+        check_license: bool = True
     ) -> User:
-        """Create a new user (checks license availability)"""
+        """
+        Create a new user (checks license availability).
+        With commit=False the user is inserted but not committed, leaving the commit to the caller.
+        password_hash lets async callers hash in the threadpool and skip hashing here.
+        check_license=False skips the license check for callers that already made it.
+        """
         if db is None:
             with get_db_context() as db:
                 return UserService.create_user(
-                    tenant_id, email, password, first_name, last_name, is_admin, db
+                    tenant_id, email, password, first_name, last_name, is_admin, db, commit,
+                    password_hash, check_license
                 )
 
         # Check license availability only for non-admin users (admins don't consume a license)
-        if not is_admin and not TenantService.check_license_availability(tenant_id, db):
+        if check_license and not is_admin and not TenantService.check_license_availability(tenant_id, db):
             raise ValueError("No available licenses. Please purchase more licenses.")
 
-        # Check if user already exists
-        existing_user = UserService.get_user_by_email(email, tenant_id, db)
-        if existing_user:
+        # Hash password unless the caller already did
+        if password_hash is None:
+            password_hash = UserService.hash_password(password)
+
+        # Create user; an existing email (any case) makes the insert a no-op instead
+        # of being checked with a separate query first
+        user = db.scalars(
+            pg_insert(User)
+            .values(
+                tenant_id=tenant_id,
+                email=email,
+                password_hash=password_hash,
+                first_name=first_name,
+                last_name=last_name,
+                is_admin=is_admin
+            )
+            .on_conflict_do_nothing(index_elements=[User.tenant_id, func.lower(User.email)])
+            .returning(User)
+        ).first()
+        if user is None:
             raise ValueError(f"User with email {email} already exists")
 
-        # Hash password
-        password_hash = UserService.hash_password(password)
-
-        # Create user
-        user = User(
-            tenant_id=tenant_id,
-            email=email,
-            password_hash=password_hash,
-            first_name=first_name,
-            last_name=last_name,
-            is_admin=is_admin
-        )
-
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+        if commit:
+            # Detach so the returned values stay readable after commit without a reload
+            db.expunge(user)
+            db.commit()
 
         logger.info(f"Created user: {user.id} ({email}) for tenant {tenant_id}")
         return user
 
+    @staticmethod
+    def create_users_bulk(tenant_id: str, users: List[Dict], db: Session) -> Dict:
+        """
+        Create many users in one INSERT and one commit.
+        Emails that already exist in the tenant (or repeat within the batch),
+        compared case-insensitively, are skipped rather than failing the batch.
+        
+        Args:
+            users: Dicts with email, password and optional first_name, last_name, is_admin
+        
+        Returns:
+            {"created": [User, ...], "skipped": [email, ...]}
+        
+        Raises:
+            ValueError: If the new non-admin users exceed the available licenses
+                        (nothing is committed)
+        """
+        seen = set()
+        unique_users = []
+        skipped = []
+        for user in users:
+            key = user["email"].lower()
+            if key in seen:
+                skipped.append(user["email"])
+            else:
+                seen.add(key)
+                unique_users.append(user)
+
+        # Reject a batch that can't fit before paying for any hashes; the post-insert
+        # check below still covers duplicates and concurrent inserts
+        available = TenantService.get_license_usage(tenant_id, db)["available_licenses"]
+        if sum(1 for u in unique_users if not u.get("is_admin", False)) > available:
+            raise ValueError("No available licenses. Please purchase more licenses.")
+
+        # Password hashing dominates; the hash libraries release the GIL, so hash in parallel
+        # on a small shared pool (each argon2 hash holds tens of MiB while it runs)
+        password_hashes = list(_HASH_EXECUTOR.map(UserService.hash_password, [u["password"] for u in unique_users]))
+
+        rows = [
+            {
+                "tenant_id": tenant_id,
+                "email": user["email"],
+                "password_hash": password_hash,
+                "first_name": user.get("first_name"),
+                "last_name": user.get("last_name"),
+                "is_admin": user.get("is_admin", False),
+            }
+            for user, password_hash in zip(unique_users, password_hashes)
+        ]
+        created = db.scalars(
+            pg_insert(User)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[User.tenant_id, func.lower(User.email)])
+            .returning(User)
+        ).all()
+
+        # Licenses are checked against what was actually inserted (duplicates don't count)
+        if sum(1 for user in created if not user.is_admin) > available:
+            db.rollback()
+            raise ValueError("No available licenses. Please purchase more licenses.")
+
+        created_emails = {user.email for user in created}
+        skipped.extend(u["email"] for u in unique_users if u["email"] not in created_emails)
+
+        # Detach so the returned users stay readable after commit without a reload
+        for user in created:
+            db.expunge(user)
+        db.commit()
+
+        logger.info("Bulk created %s users for tenant %s (%s skipped)", len(created), tenant_id, len(skipped))
+        return {"created": created, "skipped": skipped}
+
     @staticmethod
     def update_user(
         user_id: str,
@@ -150,28 +375,43 @@ class UserService:
                     user_id, tenant_id, email, first_name, last_name, is_active, is_admin, db
                 )
 
-        user = UserService.get_user_by_id(user_id, tenant_id, db)
-        if not user:
+        fields = {
+            name: value
+            for name, value in (
+                ("email", email),
+                ("first_name", first_name),
+                ("last_name", last_name),
+                ("is_active", is_active),
+                ("is_admin", is_admin),
+            )
+            if value is not None
+        }
+        if not fields:
+            user = UserService.get_user_by_id(user_id, tenant_id, db)
+            if not user:
+                raise ValueError(f"User {user_id} not found")
+            return user
+
+        # One UPDATE ... RETURNING instead of load, modify, flush, refresh; email
+        # uniqueness is enforced by the (tenant_id, lower(email)) unique index
+        try:
+            user = db.scalars(
+                update(User)
+                .where(User.id == user_id, User.tenant_id == tenant_id)
+                .values(**fields)
+                .returning(User)
+            ).one_or_none()
+        except IntegrityError:
+            db.rollback()
+            raise ValueError(f"Email {email} already exists")
+        if user is None:
             raise ValueError(f"User {user_id} not found")
 
-        if email is not None:
-            # Check if email already exists for another user
-            existing = UserService.get_user_by_email(email, tenant_id, db)
-            if existing and existing.id != user_id:
-                raise ValueError(f"Email {email} already exists")
-            user.email = email
-
-        if first_name is not None:
-            user.first_name = first_name
-        if last_name is not None:
-            user.last_name = last_name
-        if is_active is not None:
-            user.is_active = is_active
-        if is_admin is not None:
-            user.is_admin = is_admin
-
+        # Detach so the returned values stay readable after commit without a reload
+        db.expunge(user)
         db.commit()
-        db.refresh(user)
+        # Cached auth snapshots would otherwise keep the old admin/active flags
+        user_token_cache.invalidate_subject(str(user.id))
 
         logger.info(f"Updated user: {user_id}")
         return user
@@ -187,23 +427,47 @@ class UserService:
         if not user:
             raise ValueError(f"User {user_id} not found")
 
+        subject = str(user.id)
         db.delete(user)
         db.commit()
+        user_token_cache.invalidate_subject(subject)
 
         logger.info(f"Deleted user: {user_id}")
         return True
 
     @staticmethod
-    def authenticate_user(email: str, password: str, tenant_id: str, db: Session) -> Optional[User]:
-        """Authenticate user"""
-        user = UserService.get_user_by_email(email, tenant_id, db)
-        if not user:
-            return None
-
-        if not user.is_active:
-            return None
-
-        if not UserService.verify_password(password, user.password_hash):
+    def get_login_candidate(email: str, tenant_id: str, db: Session) -> Optional[User]:
+        """
+        Get the active user a login attempt refers to.
+        Password verification is left to the caller so the CPU-bound hash check
+        can run off the event loop (see UserService.verify_password).
+        """
+        user = db.query(User).filter(
+            User.email == email,
+            User.tenant_id == tenant_id
+        ).first()
+        if not user or not user.is_active:
             return None
-
         return user
+
+    @staticmethod
+    def store_password_reset_token(user_id, token_hash: bytes, expires_at: datetime, db: Session) -> None:
+        """
+        Store a user's password reset token, replacing any previous one.
+        A user has at most one reset token (unique user_id), so this is a single
+        INSERT ... ON CONFLICT (user_id) DO UPDATE.
+        """
+        stmt = pg_insert(PasswordResetToken).values(
+            user_id=user_id,
+            token_hash=token_hash,
+            expires_at=expires_at
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[PasswordResetToken.user_id],
+            set_={
+                "token_hash": stmt.excluded.token_hash,
+                "expires_at": stmt.excluded.expires_at,
+                "created_at": func.now()
+            }
+        ))
+        db.commit()
@@ -2,15 +2,19 @@
 FastAPI dependencies for authentication and tenant context
 """
 from fastapi import Depends, HTTPException, status, Request
+from fastapi.security import HTTPBearer
+from sqlalchemy import lambda_stmt, select
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Optional, Tuple
+from datetime import datetime
 from database.connection import get_db
-from database.models import User, SuperAdmin
-from utils.jwt import decode_access_token, get_token_from_header
-from services.user_service import UserService
-from services.super_admin_service import SuperAdminService
+from database.models import User, UserSession
+from utils.jwt import decode_access_token, get_token_from_header, hash_token
+from services.user_service import UserSnapshot
+from services.tenant_service import TenantSnapshot
+from services.super_admin_service import SuperAdminService, SuperAdminSnapshot
+from utils.token_cache import super_admin_token_cache, user_token_cache
 import logging
-import hashlib
 
 logger = logging.getLogger(__name__)
 
@@ -31,12 +35,51 @@ def get_current_tenant_id(request: Request) -> str:
     return tenant_id
 
 
+def get_current_tenant(request: Request) -> TenantSnapshot:
+    """
+    Get the tenant TenantMiddleware resolved for this request's host (an in-memory
+    snapshot, so no query is needed to read its fields)
+    
+    Raises:
+        HTTPException: If no tenant was resolved
+    """
+    get_current_tenant_id(request)
+    return request.state.tenant
+
+
+class BearerTokenScheme(HTTPBearer):
+    """
+    HTTPBearer as far as OpenAPI is concerned (so /docs keeps its Authorize button),
+    but resolves straight to the raw token string instead of building an
+    HTTPAuthorizationCredentials object per request.
+    """
+
+    async def __call__(self, request: Request) -> str:
+        """
+        Read the raw token from an "Authorization: Bearer <token>" header.
+        
+        Raises:
+            HTTPException: If the header is missing or not a bearer credential
+        """
+        auth = request.headers.get("authorization")
+        if not auth or auth[:7].lower() != "bearer ":
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not authenticated",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return auth[7:].strip()
+
+
+get_bearer_token = BearerTokenScheme()
+
+
 def get_current_user(
     request: Request,
     authorization: Optional[str] = None,
     db: Session = Depends(get_db),
     credentials: Optional[str] = None
-) -> User:
+) -> UserSnapshot:
     """
     Get current authenticated user from JWT token
     
@@ -46,7 +89,8 @@ def get_current_user(
         db: Database session
     
     Returns:
-        User object
+        UserSnapshot of the user (served from the token cache when the same token
+        was verified within the last USER_TOKEN_CACHE_TTL_SECONDS)
     
     Raises:
         HTTPException: If user is not authenticated or not found
@@ -58,6 +102,15 @@ def get_current_user(
     token_str = credentials if credentials else authorization
     token = get_token_from_header(token_str)
     
+    cached = user_token_cache.get(token)
+    if cached is not None:
+        if str(cached.tenant_id) != tenant_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Token tenant does not match request tenant"
+            )
+        return cached
+    
     # Decode token
     payload = decode_access_token(token)
     
@@ -78,29 +131,24 @@ def get_current_user(
             detail="Token tenant does not match request tenant"
         )
     
-    # SINGLE SESSION VALIDATION: Verify session exists and is valid
-    from database.models import UserSession
-    from datetime import datetime
-    
-    token_hash = hashlib.sha256(token.encode()).hexdigest()
-    active_session = db.query(UserSession).filter(
-        UserSession.user_id == user_id,
-        UserSession.token_hash == token_hash,
-        UserSession.expires_at > datetime.utcnow()
-    ).first()
-    
-    if not active_session:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Session expired or invalid. Please login again."
+    # SINGLE SESSION VALIDATION: load the user only through a live session for this
+    # exact token, so session check and user lookup are one round trip. Built as a
+    # cached lambda_stmt; the closure variables are sent as bound parameters
+    token_hash = hash_token(token)
+    now = datetime.utcnow()
+    user = db.scalars(lambda_stmt(
+        lambda: select(User).join(UserSession, UserSession.user_id == User.id).where(
+            User.id == user_id,
+            User.tenant_id == tenant_id,
+            UserSession.token_hash == token_hash,
+            UserSession.expires_at > now
         )
+    )).first()
     
-    # Get user from database
-    user = UserService.get_user_by_id(user_id, tenant_id, db)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
+            detail="Session expired or invalid. Please login again."
         )
     
     if not user.is_active:
@@ -109,12 +157,14 @@ def get_current_user(
             detail="User account is inactive"
         )
     
-    return user
+    snapshot = UserSnapshot.from_user(user)
+    user_token_cache.set(token, str(user.id), snapshot, token_exp=payload.get("exp"))
+    return snapshot
 
 
 def get_current_admin_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: UserSnapshot = Depends(get_current_user)
+) -> UserSnapshot:
     """
     Get current user and verify they are an admin
     
@@ -122,7 +172,7 @@ def get_current_admin_user(
         current_user: Current authenticated user
     
     Returns:
-        User object (admin)
+        UserSnapshot (admin)
     
     Raises:
         HTTPException: If user is not an admin
@@ -135,29 +185,58 @@ def get_current_admin_user(
     return current_user
 
 
+def require_user_and_tenant(
+    request: Request,
+    token: str = Depends(get_bearer_token),
+    db: Session = Depends(get_db)
+) -> Tuple[UserSnapshot, str]:
+    """
+    Dependency resolving the authenticated user and the request's tenant in one pass.
+    
+    Returns:
+        (user, tenant_id); the tenant is the one the token was verified against
+    """
+    user = get_current_user(request, credentials=token, db=db)
+    return user, request.state.tenant_id
+
+
+def require_admin_and_tenant(
+    auth: Tuple[UserSnapshot, str] = Depends(require_user_and_tenant)
+) -> Tuple[UserSnapshot, str]:
+    """
+    Same as require_user_and_tenant, additionally requiring a tenant admin.
+    
+    Raises:
+        HTTPException: If the user is not an admin
+    """
+    get_current_admin_user(auth[0])
+    return auth
+
+
 def get_current_super_admin(
     request: Request,
     credentials: Optional[str] = None,
     authorization: Optional[str] = None,
     db: Session = Depends(get_db)
-) -> SuperAdmin:
+) -> SuperAdminSnapshot:
     """
     Get current authenticated super admin from JWT token
     (No tenant context required)
     
     Args:
         request: FastAPI request object
-        credentials: Raw token from HTTPBearer() (preferred)
+        credentials: Raw token from get_bearer_token (preferred)
         authorization: Full "Bearer <token>" header string
         db: Database session
     
     Returns:
-        SuperAdmin object
+        SuperAdminSnapshot of the admin (served from the token cache when the same
+        token was verified within the last TOKEN_CACHE_TTL_SECONDS)
     
     Raises:
         HTTPException: If super admin is not authenticated or not found
     """
-    # HTTPBearer() passes the raw token in credentials.credentials; use it directly
+    # get_bearer_token already hands over the raw token; use it directly
     if credentials:
         token = credentials
     elif authorization:
@@ -169,6 +248,11 @@ def get_current_super_admin(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Tokens verified recently skip the JWT check and DB lookup
+    cached = super_admin_token_cache.get(token)
+    if cached is not None:
+        return cached
+
     # Decode token
     payload = decode_access_token(token)
     
@@ -202,4 +286,6 @@ def get_current_super_admin(
             detail="Super admin account is inactive"
         )
     
-    return admin
+    snapshot = SuperAdminSnapshot.from_admin(admin)
+    super_admin_token_cache.set(token, str(admin.id), snapshot, token_exp=payload.get("exp"))
+    return snapshot
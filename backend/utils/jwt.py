@@ -3,9 +3,15 @@ JWT Token utilities for authentication
 """
 from datetime import datetime, timedelta
 from typing import Optional, Dict
-from jose import JWTError, jwt
 from fastapi import HTTPException, status
+import base64
+import binascii
+import calendar
+import hmac
 import os
+import hashlib
+import time
+import orjson
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,6 +21,54 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production-min-3
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
+# Every token we issue uses the same header, so encode it (and the key) once.
+# This is the compact base64url form of {"alg":"HS256","typ":"JWT"}.
+_HEADER_B64 = b"eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9"
+_KEY = SECRET_KEY.encode()
+
+
+def _b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64url_decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _encode_hs256(payload: Dict) -> str:
+    """Sign an HS256 JWT with the precomputed header and key."""
+    signing_input = _HEADER_B64 + b"." + _b64url(orjson.dumps(payload))
+    signature = hmac.new(_KEY, signing_input, hashlib.sha256).digest()
+    return (signing_input + b"." + _b64url(signature)).decode("ascii")
+
+
+def _decode_hs256(token: str) -> Optional[Dict]:
+    """
+    Verify an HS256 JWT and return its claims, or None if it is malformed,
+    signed with another header/key, or expired.
+    """
+    header_b64, sep, rest = token.partition(".")
+    payload_b64, sep2, signature_b64 = rest.partition(".")
+    if not sep or not sep2 or header_b64.encode() != _HEADER_B64:
+        return None
+    try:
+        signature = _b64url_decode(signature_b64)
+        expected = hmac.new(
+            _KEY, token[:len(header_b64) + 1 + len(payload_b64)].encode(), hashlib.sha256
+        ).digest()
+        # Compare the raw 32-byte digests, not their encoded forms
+        if not hmac.compare_digest(signature, expected):
+            return None
+        payload = orjson.loads(_b64url_decode(payload_b64))
+    except (binascii.Error, ValueError, UnicodeEncodeError):
+        return None
+    if not isinstance(payload, dict):
+        return None
+    exp = payload.get("exp")
+    if exp is not None and (not isinstance(exp, int) or exp < time.time()):
+        return None
+    return payload
+
 
 def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -34,9 +88,9 @@ def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    # "exp" is a NumericDate: integer seconds since the epoch (UTC)
+    to_encode["exp"] = calendar.timegm(expire.utctimetuple())
+    return _encode_hs256(to_encode)
 
 
 def decode_access_token(token: str) -> Dict:
@@ -52,15 +106,14 @@ def decode_access_token(token: str) -> Dict:
     Raises:
         HTTPException: If token is invalid or expired
     """
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except JWTError as e:
+    payload = _decode_hs256(token)
+    if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return payload
 
 
 def get_token_from_header(authorization: Optional[str]) -> str:
@@ -68,7 +121,7 @@ def get_token_from_header(authorization: Optional[str]) -> str:
     Extract token from Authorization header or raw token.
     
     Args:
-        authorization: Either "Bearer <token>" or the raw token string (e.g. from HTTPBearer().credentials)
+        authorization: Either "Bearer <token>" or the raw token string (e.g. from get_bearer_token)
     
     Returns:
         Token string
@@ -94,3 +147,33 @@ def get_token_from_header(authorization: Optional[str]) -> str:
         detail="Invalid authorization header format. Expected: Bearer <token>",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def hash_token(token: str) -> str:
+    """
+    Hash a bearer/reset token for storage and lookup (sessions, password resets).
+    
+    Tokens are high-entropy random values, so a single unsalted SHA-256 is enough;
+    the hex form must stay stable because stored hashes are matched against it.
+    
+    Args:
+        token: Raw token string
+    
+    Returns:
+        Hex-encoded SHA-256 digest
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def hash_token_digest(token: str) -> bytes:
+    """
+    Raw SHA-256 digest of a token, for columns that store hashes as bytes
+    (password_reset_tokens.token_hash).
+    
+    Args:
+        token: Raw token string
+    
+    Returns:
+        32-byte SHA-256 digest
+    """
+    return hashlib.sha256(token.encode()).digest()
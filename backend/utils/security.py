@@ -0,0 +1,44 @@
+"""
+Password hashing utilities shared by user and super admin services
+"""
+from functools import lru_cache
+from passlib.context import CryptContext
+import os
+
+
+@lru_cache(maxsize=1)
+def get_pwd_context() -> CryptContext:
+    """
+    Get the process-wide password hashing context.
+    
+    Built on first use rather than at import time, so importing services and
+    endpoints stays cheap. New hashes use argon2id; existing bcrypt hashes still
+    verify and are flagged for upgrade by needs_update(). The bcrypt cost
+    factor comes from BCRYPT_ROUNDS (default 10); it is read here rather than at
+    import so values loaded from .env are picked up.
+    
+    Returns:
+        Shared CryptContext instance
+    """
+    bcrypt_rounds = int(os.getenv("BCRYPT_ROUNDS", "10"))
+    return CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto", bcrypt__rounds=bcrypt_rounds)
+
+
+@lru_cache(maxsize=1)
+def get_seed_pwd_context() -> CryptContext:
+    """
+    Get a deliberately cheap hashing context for dev/load-test seed data only.
+    
+    Produces argon2id hashes with minimal cost, so they verify with the normal
+    context and get_pwd_context().needs_update() flags them; the first real
+    login rehashes them at full cost. Never use for real accounts.
+    
+    Returns:
+        Shared CryptContext instance
+    """
+    return CryptContext(
+        schemes=["argon2"],
+        argon2__time_cost=1,
+        argon2__memory_cost=8192,
+        argon2__parallelism=1
+    )
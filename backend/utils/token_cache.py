@@ -0,0 +1,68 @@
+"""
+In-process cache of verified bearer tokens
+"""
+from typing import Any, Optional
+from cachetools import TTLCache
+import hashlib
+import threading
+import time
+
+# Upper bound on how long a verified token is trusted without re-checking the DB
+TOKEN_CACHE_TTL_SECONDS = 60
+TOKEN_CACHE_MAXSIZE = 10_000
+
+
+class TokenCache:
+    """
+    TTL-bounded map of token -> identity snapshot.
+    
+    Entries are keyed by a short blake2b digest of the token (the raw token is never
+    stored) and tagged with the token's subject so all entries for an account can
+    be dropped at once. An entry is never served past the token's own expiry.
+    """
+
+    def __init__(self, maxsize: int = TOKEN_CACHE_MAXSIZE, ttl: int = TOKEN_CACHE_TTL_SECONDS):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, token: str) -> Optional[Any]:
+        """Return the cached snapshot for a token, or None on miss/expiry"""
+        key = self._key(token)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            value, _subject, token_exp = entry
+            if token_exp is not None and time.time() >= token_exp:
+                del self._cache[key]
+                return None
+            return value
+
+    def set(self, token: str, subject: str, value: Any, token_exp: Optional[float] = None) -> None:
+        """Cache a snapshot for a verified token (token_exp: JWT "exp" as a Unix timestamp)"""
+        with self._lock:
+            self._cache[self._key(token)] = (value, subject, token_exp)
+
+    def invalidate_subject(self, subject: str) -> None:
+        """Drop every cached token belonging to a subject (e.g. after login or an account change)"""
+        with self._lock:
+            stale = [key for key, (_value, entry_subject, _exp) in self._cache.items() if entry_subject == subject]
+            for key in stale:
+                self._cache.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+# Verified super admin tokens -> SuperAdminSnapshot
+super_admin_token_cache = TokenCache()
+
+# Verified tenant user tokens -> UserSnapshot. Shorter TTL: a user's session can be
+# revoked by a login elsewhere (single-session), possibly on another worker
+USER_TOKEN_CACHE_TTL_SECONDS = 30
+user_token_cache = TokenCache(ttl=USER_TOKEN_CACHE_TTL_SECONDS)
@@ -0,0 +1,35 @@
+"""
+Reusable Pydantic field types for request models
+"""
+from typing_extensions import Annotated
+from pydantic import AfterValidator, WithJsonSchema
+import re
+
+# Pragmatic address shape check: one "@", no whitespace, a dot in the domain
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_EMAIL_MAX_LENGTH = 254
+
+
+def normalize_email(v: str) -> str:
+    """
+    Validate an email address and return its canonical form.
+    
+    Surrounding whitespace is stripped and the domain is lowercased; the local part
+    is kept as-is (matching the normalization EmailStr applied to stored addresses).
+    
+    Raises:
+        ValueError: If the value is not a valid email address
+    """
+    v = v.strip()
+    if len(v) > _EMAIL_MAX_LENGTH or not _EMAIL_RE.match(v):
+        raise ValueError("value is not a valid email address")
+    local, _, domain = v.rpartition("@")
+    return f"{local}@{domain.lower()}"
+
+
+# Drop-in replacement for EmailStr without the email-validator round trip
+EmailAddress = Annotated[
+    str,
+    AfterValidator(normalize_email),
+    WithJsonSchema({"type": "string", "format": "email"}),
+]
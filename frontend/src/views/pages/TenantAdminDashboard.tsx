@@ -115,7 +115,7 @@ export function TenantAdminDashboard() {
       });
 
       // Load users
-      const usersRes = await axios.get<{ users: User[]; total: number }>(
+      const usersRes = await axios.get<{ users: User[]; next_cursor: string | null }>(
         `${API_BASE_URL}/api/v1/users`,
         { headers }
       );